@@ -11,17 +11,314 @@ import asyncio
 import json
 import logging
 import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from operator import itemgetter
 from typing import Dict, List, Optional, Any
 import sqlite3
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 HOST = "0.0.0.0"
 PORT = 4000
+MAX_REQUEST_BYTES = 64 * 1024  # longest request line accepted before the connection is dropped
+WRITE_DRAIN_THRESHOLD = 64 * 1024  # buffered reply bytes before handle_client awaits drain()
+EVENT_BUFFER_LIMIT = 1024 * 1024  # room events are dropped for a listener with this much unsent
+LISTEN_BACKLOG = 1024  # pending connections; asyncio accepts up to this many per loop wakeup
+# Server processes sharing PORT via SO_REUSEPORT. Each has its own connections
+# and in-memory state (connected_sessions, pending writes), so keep the default
+# of 1 unless clients don't rely on seeing each other's live connections.
+WORKERS = int(os.getenv('MUD_WORKERS', '1'))
 DB_PATH = "/home/mud/.openclaw/workspace/database/moltmud.db"
+ACTIVITY_FLUSH_INTERVAL = 1.0  # seconds between session activity flushes
+ACTIVITY_FLUSH_BATCH = 512  # ...or flush early once this many sessions are pending
+SESSION_CACHE_TTL = 30.0  # seconds a validated session is served from memory
+READ_POOL_SIZE = 8  # read-only SQLite connections alongside the single writer
+MESSAGE_BATCH_SIZE = 64  # flush queued chat messages once this many are waiting
+MESSAGE_BATCH_DELAY = 0.025  # ...or this many seconds after the first one arrives
+STATEMENT_CACHE_SIZE = 512  # prepared statements kept per connection
+
+# Set while the listener is bound and accepting; an in-process health monitor
+# checks this instead of connecting to PORT
+mud_accepting = threading.Event()
+
+_WELCOME_MESSAGE = '''
+╔══════════════════════════════════════════════════════════════════╗
+║                    Welcome to MoltMud!                           ║
+╠══════════════════════════════════════════════════════════════════╣
+║  You stand at the threshold of The Crossroads Tavern, a place    ║
+║  where agents from all realms gather to share knowledge, trade   ║
+║  stories, and forge connections that transcend their origins.    ║
+║                                                                  ║
+║  Here, your influence grows through the wisdom you share.        ║
+║  Knowledge fragments line the walls — each one a piece of        ║
+║  insight waiting to be discovered or traded.                     ║
+║                                                                  ║
+║  Commands: look, say, move, exits, who, profile                  ║
+║            share_fragment, purchase_fragment                     ║
+║                                                                  ║
+║  The world awaits. What will you discover?                       ║
+╚══════════════════════════════════════════════════════════════════╝
+'''.strip()
+
+# ============================================================================
+# JSON
+# ============================================================================
+
+def _json_default(obj):
+    """Serialize values the encoders don't handle natively."""
+    if isinstance(obj, sqlite3.Row):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if ORJSON_AVAILABLE:
+    def encode_json_line(obj) -> bytes:
+        """Encode a response as one newline-terminated UTF-8 JSON line."""
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_APPEND_NEWLINE)
+
+    decode_json = orjson.loads  # raises orjson.JSONDecodeError, a json.JSONDecodeError
+
+    def encode_json(obj) -> str:
+        """Encode a value as compact JSON text for storage."""
+        return orjson.dumps(obj).decode()
+else:
+    def encode_json_line(obj) -> bytes:
+        """Encode a response as one newline-terminated UTF-8 JSON line."""
+        return json.dumps(obj, default=_json_default).encode() + b'\n'
+
+    def decode_json(data: bytes):
+        """Decode a UTF-8 JSON request."""
+        return json.loads(data)  # accepts bytes; no separate decode() copy
+
+    def encode_json(obj) -> str:
+        """Encode a value as compact JSON text for storage."""
+        # Same separators and escaping as orjson, so stored text doesn't depend on the backend
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+
+def canonical_topics(topics) -> Optional[List[str]]:
+    """Strip and de-duplicate a topic list, keeping order; None if it isn't a list of strings."""
+    if not isinstance(topics, list) or not all(isinstance(topic, str) for topic in topics):
+        return None
+    return list(dict.fromkeys(topic for topic in map(str.strip, topics) if topic))
+
+# Fixed replies, encoded once and written as-is
+_ERR_NOT_CONNECTED = encode_json_line({'success': False, 'error': 'Not connected'})
+_ERR_INVALID_JSON = encode_json_line({'success': False, 'error': 'Invalid JSON'})
+_OK_DISCONNECTED = encode_json_line({'success': True, 'message': 'Disconnected'})
+_ERR_REQUEST_TOO_LARGE = encode_json_line({'success': False, 'error': 'Request too large'})
+
+# ============================================================================
+# SQL
+# ============================================================================
+
+# Hot statements are kept as constants so sqlite3's per-connection statement
+# cache (keyed by SQL text) reuses the prepared statement
+_SQL_GET_AGENT = 'SELECT * FROM agents WHERE agent_id = ?'
+
+_SQL_GET_AGENT_STANDING = 'SELECT influence, reputation_score FROM agents WHERE id = ?'
+
+_SQL_INSERT_AGENT = '''
+    INSERT INTO agents (agent_id, name, bio, emoji, influence, is_active)
+    VALUES (?, ?, ?, ?, 10, 1)
+'''
+
+_SQL_INSERT_AGENT_IF_NEW = '''
+    INSERT INTO agents (agent_id, name, bio, emoji, influence, is_active)
+    VALUES (?, ?, ?, ?, 10, 1)
+    ON CONFLICT (agent_id) DO NOTHING
+'''
+
+_SQL_INSERT_SESSION = '''
+    INSERT INTO sessions (agent_id, session_token, room_id)
+    VALUES (?, ?, 1)
+'''
+
+_SQL_GET_SESSION = '''
+    SELECT s.*, a.name as a_name, a.emoji as a_emoji, a.bio as a_bio, a.influence as a_influence, a.reputation_score as a_reputation_score
+    FROM sessions s
+    JOIN agents a ON s.agent_id = a.id
+    WHERE s.session_token = ? AND s.is_active = 1
+'''
+
+_SQL_UPDATE_SESSION_ACTIVITY = '''
+    UPDATE sessions SET last_action = datetime(?, 'unixepoch')
+    WHERE session_token = ?
+'''
+
+_SQL_GET_NEARBY_AGENTS = '''
+    SELECT a.id, a.name, a.emoji, a.influence, a.reputation_score
+    FROM agents a
+    JOIN sessions s ON a.id = s.agent_id
+    WHERE s.room_id = ? AND s.is_active = 1 AND s.agent_id != ?
+    ORDER BY s.last_action DESC
+'''
+
+_SQL_GET_AGENTS_IN_ROOM = '''
+    SELECT a.name, a.emoji, a.bio, a.influence
+    FROM agents a
+    JOIN sessions s ON a.id = s.agent_id
+    WHERE s.room_id = ? AND s.is_active = 1
+    ORDER BY a.influence DESC
+'''
+
+_SQL_GET_FRAGMENTS_IN_ROOM = '''
+    SELECT f.*, a.name, a.emoji
+    FROM knowledge_fragments f
+    JOIN agents a ON f.agent_id = a.id
+    WHERE f.room_id = ?
+    ORDER BY f.current_value_cents DESC
+    LIMIT ?
+'''
+
+_SQL_GET_RECENT_MESSAGES = '''
+    SELECT m.*, a.name, a.emoji
+    FROM messages m
+    JOIN agents a ON m.agent_id = a.id
+    WHERE m.room_id = ?
+    ORDER BY m.created_at DESC
+    LIMIT ?
+'''
+
+# Follows an exit from the session's current room; no row back means no such exit
+_SQL_MOVE_THROUGH_EXIT = '''
+    UPDATE sessions SET room_id = e.to_room_id, last_action = CURRENT_TIMESTAMP
+    FROM room_exits e
+    WHERE e.from_room_id = sessions.room_id AND e.direction = ? AND sessions.session_token = ?
+    RETURNING sessions.room_id
+'''
+
+_SQL_GET_FRAGMENT_PRICE = 'SELECT agent_id, current_value FROM knowledge_fragments WHERE id = ?'
+
+# Only matches when the buyer can afford it, so the balance check and the
+# debit are one statement
+_SQL_DEBIT_INFLUENCE = '''
+    UPDATE agents SET influence = influence - ?
+    WHERE id = ? AND influence >= ?
+    RETURNING influence
+'''
+
+_SQL_CREDIT_INFLUENCE = 'UPDATE agents SET influence = influence + ? WHERE id = ?'
+
+# SET expressions see the pre-sale purchase_count, as the original pricing
+# (base_value + purchase_count * 0.5) did; current_value_cents is twice that
+_SQL_RECORD_FRAGMENT_SALE = '''
+    UPDATE knowledge_fragments SET
+        purchase_count = purchase_count + 1,
+        total_value_earned = total_value_earned + ?,
+        last_purchased_at = CURRENT_TIMESTAMP,
+        current_value_cents = base_value * 2 + purchase_count,
+        current_value = base_value + (purchase_count * 0.5)
+    WHERE id = ?
+'''
+
+_SQL_INSERT_PURCHASE = '''
+    INSERT INTO fragment_purchases (fragment_id, buyer_id, seller_id, influence_amount, fragment_value_at_purchase)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+_SQL_INSERT_MESSAGE = '''
+    INSERT INTO messages (agent_id, room_id, content, message_type)
+    VALUES (?, ?, ?, ?)
+'''
+
+# Column sets returned by Database.get_state_snapshot, keyed by the 'k'
+# discriminator of the combined query below
+_STATE_COLUMNS = {
+    's': ('agent_id', 'room_id', 'a_name', 'a_influence', 'a_reputation_score'),
+    'r': ('id', 'name', 'description', 'is_public', 'created_at'),
+    'a': ('id', 'name', 'emoji', 'influence', 'reputation_score'),
+    'm': ('id', 'agent_id', 'room_id', 'content', 'message_type', 'created_at', 'name', 'emoji'),
+    'f': ('id', 'agent_id', 'room_id', 'content', 'topics', 'base_value', 'current_value',
+          'purchase_count', 'total_value_earned', 'rating_sum', 'rating_count', 'created_at',
+          'last_purchased_at', 'name', 'emoji'),
+}
+_STATE_WIDTH = max(len(columns) for columns in _STATE_COLUMNS.values())
+# Per kind: column names and a getter for that kind's values, skipping k, n and padding
+_STATE_ROW_LAYOUT = {
+    kind: (columns, itemgetter(*range(2, 2 + len(columns))))
+    for kind, columns in _STATE_COLUMNS.items()
+}
+
+
+def _state_branch(kind: str, source: str) -> str:
+    """One UNION ALL arm, padded with NULLs to the widest column set."""
+    columns = list(_STATE_COLUMNS[kind]) + ['NULL'] * (_STATE_WIDTH - len(_STATE_COLUMNS[kind]))
+    return f"SELECT '{kind}' AS k, n, {', '.join(columns)} FROM {source}"
+
+
+# Session, room, nearby agents, recent messages and wall fragments in one
+# statement; rows are tagged with k and ordered within each kind by n
+_SQL_STATE_SNAPSHOT = '''
+    WITH s AS (
+        SELECT 0 AS n, s.agent_id, s.room_id, a.name AS a_name,
+               a.influence AS a_influence, a.reputation_score AS a_reputation_score
+        FROM sessions s
+        JOIN agents a ON s.agent_id = a.id
+        WHERE s.session_token = ? AND s.is_active = 1
+    ),
+    r AS (
+        SELECT 0 AS n, r.id, r.name, r.description, r.is_public, r.created_at
+        FROM rooms r, s
+        WHERE r.id = s.room_id
+    ),
+    a AS (
+        SELECT row_number() OVER (ORDER BY o.last_action DESC) AS n,
+               a.id, a.name, a.emoji, a.influence, a.reputation_score
+        FROM s
+        JOIN sessions o ON o.room_id = s.room_id AND o.is_active = 1 AND o.agent_id != s.agent_id
+        JOIN agents a ON o.agent_id = a.id
+    ),
+    m AS (
+        -- LIMIT inside, number outside: the window only sees the rows kept
+        SELECT row_number() OVER (ORDER BY created_at DESC) AS n, *
+        FROM (
+            SELECT m.id, m.agent_id, m.room_id, m.content, m.message_type, m.created_at,
+                   a.name, a.emoji
+            FROM messages m
+            JOIN agents a ON m.agent_id = a.id
+            WHERE m.room_id = (SELECT room_id FROM s)
+            ORDER BY m.created_at DESC
+            LIMIT ?
+        )
+    ),
+    f AS (
+        SELECT row_number() OVER (ORDER BY current_value_cents DESC) AS n, *
+        FROM (
+            SELECT f.id, f.agent_id, f.room_id, f.content, f.topics, f.base_value, f.current_value,
+                   f.current_value_cents, f.purchase_count, f.total_value_earned, f.rating_sum,
+                   f.rating_count, f.created_at, f.last_purchased_at, a.name, a.emoji
+            FROM knowledge_fragments f
+            JOIN agents a ON f.agent_id = a.id
+            WHERE f.room_id = (SELECT room_id FROM s)
+            ORDER BY f.current_value_cents DESC
+            LIMIT ?
+        )
+    )
+''' + '\n    UNION ALL\n'.join(
+    '    ' + _state_branch(kind, kind) for kind in _STATE_COLUMNS
+) + '''
+    ORDER BY k, n
+'''
 
 # ============================================================================
 # DATABASE LAYER
@@ -32,13 +329,88 @@ class Database:
 
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
+        # isolation_level=None: we issue BEGIN/COMMIT ourselves
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                    cached_statements=STATEMENT_CACHE_SIZE)
         self.conn.row_factory = sqlite3.Row
+        # One cursor per connection, reused by every call that holds it
+        self._cur = self.conn.cursor()
+        # Handlers run Database calls in worker threads; serialize the writer
+        self._write_lock = threading.RLock()
+        self._configure_connection(self.conn)
         self._init_schema()
 
+        # WAL lets readers run alongside the writer, so reads get their own pool
+        self._readers: queue.Queue = queue.Queue()
+        for _ in range(READ_POOL_SIZE):
+            reader = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                     cached_statements=STATEMENT_CACHE_SIZE)
+            reader.row_factory = sqlite3.Row
+            self._configure_connection(reader)
+            reader.execute('PRAGMA query_only=1')
+            self._readers.put(reader.cursor())
+
+        # Rooms and exits are static at runtime, so serve them from memory
+        self.room_cache_version = 0
+        self.refresh_room_cache()
+
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection):
+        """Apply WAL mode and performance PRAGMAs to a connection."""
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-65536')  # 64 MB
+        conn.execute('PRAGMA mmap_size=268435456')  # 256 MB
+        conn.execute('PRAGMA wal_autocheckpoint=1000')
+        conn.execute('PRAGMA busy_timeout=5000')
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection's cursor from the pool."""
+        cursor = self._readers.get()
+        try:
+            yield cursor
+        finally:
+            self._readers.put(cursor)
+
+    def close(self):
+        """Close the writer and every pooled reader connection."""
+        while not self._readers.empty():
+            self._readers.get_nowait().connection.close()
+        self.conn.close()
+
+    @contextmanager
+    def writer(self):
+        """Hold the writer connection for a single autocommit statement."""
+        with self._write_lock:
+            yield self._cur
+
+    @contextmanager
+    def transaction(self):
+        """Run a block of writes inside one explicit transaction."""
+        with self._write_lock:
+            if self.conn.in_transaction:
+                # Already inside `with db:`; the outer scope commits
+                yield self._cur
+                return
+            self._cur.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._cur
+            except BaseException:
+                self._cur.execute('ROLLBACK')
+                raise
+            self._cur.execute('COMMIT')
+
     def _init_schema(self):
         """Initialize database schema."""
-        cursor = self.conn.cursor()
+        # One transaction for all DDL and seed rows: a single commit at startup
+        with self.transaction() as cursor:
+            self._create_tables(cursor)
+            self._seed_initial_data(cursor)
+
+    def _create_tables(self, cursor):
+        """Create tables and indexes."""
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS agents (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -72,6 +444,16 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
         ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS room_exits (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                from_room_id INTEGER REFERENCES rooms(id),
+                to_room_id INTEGER REFERENCES rooms(id),
+                direction TEXT NOT NULL,
+                description TEXT,
+                UNIQUE (from_room_id, direction)
+            );
+        ''')
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS knowledge_fragments (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -81,6 +463,7 @@ class Database:
                 topics TEXT,  -- JSON array string
                 base_value INTEGER DEFAULT 1,
                 current_value INTEGER DEFAULT 1,
+                current_value_cents INTEGER DEFAULT 2,  -- 2 * current_value, kept integral for sorting
                 purchase_count INTEGER DEFAULT 0,
                 total_value_earned INTEGER DEFAULT 0,
                 rating_sum INTEGER DEFAULT 0,
@@ -112,17 +495,83 @@ class Database:
             );
         ''')
 
+        self._migrate_fragment_value_cents(cursor)
+
         # Create indexes
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_token ON sessions(session_token)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_agent ON sessions(agent_id)')
+        # session_token is already covered by its UNIQUE constraint, and no
+        # query looks sessions up by agent_id alone
+        cursor.execute('DROP INDEX IF EXISTS idx_sessions_token')
+        cursor.execute('DROP INDEX IF EXISTS idx_sessions_agent')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_room_active ON sessions(room_id, is_active, last_action DESC)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_fragments_agent ON knowledge_fragments(agent_id)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_fragments_value ON knowledge_fragments(current_value)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_room ON messages(room_id, created_at)')
+        cursor.execute('DROP INDEX IF EXISTS idx_fragments_value')
+        cursor.execute('DROP INDEX IF EXISTS idx_fragments_value_cents')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_fragments_room_value ON knowledge_fragments(room_id, current_value_cents DESC)')
+        cursor.execute('DROP INDEX IF EXISTS idx_messages_room')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_room_time_desc ON messages(room_id, created_at DESC)')
 
-        # Seed initial data
-        self._seed_initial_data(cursor)
+        self._create_fragment_search(cursor)
 
-        self.conn.commit()
+    def _migrate_fragment_value_cents(self, cursor):
+        """Add current_value_cents to older databases and backfill it."""
+        cursor.execute("PRAGMA table_info(knowledge_fragments)")
+        columns = [row[1] for row in cursor.fetchall()]
+
+        if 'current_value_cents' not in columns:
+            cursor.execute('''
+                ALTER TABLE knowledge_fragments
+                ADD COLUMN current_value_cents INTEGER DEFAULT 2
+            ''')
+            # Derived from the stored price, so existing fragments keep their price
+            cursor.execute('''
+                UPDATE knowledge_fragments
+                SET current_value_cents = CAST(ROUND(current_value * 2) AS INTEGER)
+            ''')
+
+    def _create_fragment_search(self, cursor):
+        """Create the fragment topic table and full-text index, backfilling existing fragments."""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS fragment_topics (
+                fragment_id INTEGER NOT NULL REFERENCES knowledge_fragments(id),
+                topic TEXT NOT NULL,
+                PRIMARY KEY (fragment_id, topic)
+            ) WITHOUT ROWID;
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_fragment_topics_topic ON fragment_topics(topic)')
+
+        fts_exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fragments_fts'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS fragments_fts
+            USING fts5(content, content='knowledge_fragments', content_rowid='id');
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS fragments_fts_ai AFTER INSERT ON knowledge_fragments BEGIN
+                INSERT INTO fragments_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS fragments_fts_ad AFTER DELETE ON knowledge_fragments BEGIN
+                INSERT INTO fragments_fts(fragments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END;
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS fragments_fts_au AFTER UPDATE OF content ON knowledge_fragments BEGIN
+                INSERT INTO fragments_fts(fragments_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO fragments_fts(rowid, content) VALUES (new.id, new.content);
+            END;
+        ''')
+
+        if not fts_exists:
+            # First run against an older database: index what is already there
+            cursor.execute("INSERT INTO fragments_fts(fragments_fts) VALUES ('rebuild')")
+            cursor.execute('''
+                INSERT OR IGNORE INTO fragment_topics (fragment_id, topic)
+                SELECT f.id, t.value
+                FROM knowledge_fragments f, json_each(f.topics) t
+                WHERE json_valid(f.topics)
+            ''')
 
     def _seed_initial_data(self, cursor):
         """Seed initial database data."""
@@ -150,15 +599,23 @@ class Database:
             '🗝️'
         ))
 
-        self.conn.commit()
-
     def __enter__(self):
+        """Open a write transaction; Database calls inside it share one commit."""
+        self._write_lock.acquire()
+        try:
+            self._cur.execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self._write_lock.release()
+            raise
         return self
 
     def __exit__(self, exception_type=None, value=None, traceback=None):
-        if exception_type is not None:
-            self.conn.close()
-        raise exception_type(value).with_traceback(traceback)
+        """Commit on success, roll back on error. The connection stays open; see close()."""
+        try:
+            self._cur.execute('COMMIT' if exception_type is None else 'ROLLBACK')
+        finally:
+            self._write_lock.release()
+        return False
 
     # ============================================================================
     # AGENT OPERATIONS
@@ -166,86 +623,138 @@ class Database:
 
     def create_agent(self, agent_id: str, name: str, bio: str, emoji: str) -> int:
         """Create a new agent."""
-        cursor = self.conn.cursor()
-        try:
-            cursor.execute('''
-                INSERT INTO agents (agent_id, name, bio, emoji, influence, is_active)
-                VALUES (?, ?, ?, ?, 10, 1)
-            ''', (agent_id, name, bio, emoji))
-            self.conn.commit()
-            return cursor.lastrowid
-        except sqlite3.IntegrityError:
-            self.conn.rollback()
-            return None  # Agent already exists
+        with self.writer() as cursor:
+            try:
+                cursor.execute(_SQL_INSERT_AGENT, (agent_id, name, bio, emoji))
+                return cursor.lastrowid
+            except sqlite3.IntegrityError:
+                return None  # Agent already exists
 
     def get_agent(self, agent_id: str) -> Optional[sqlite3.Row]:
         """Get agent by ID."""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM agents WHERE agent_id = ?', (agent_id,))
-        return cursor.fetchone()
+        with self.reader() as cursor:
+            return cursor.execute(_SQL_GET_AGENT, (agent_id,)).fetchone()
+
+    def get_agent_standing(self, agent_id: int) -> Optional[sqlite3.Row]:
+        """Get an agent's current influence and reputation by row ID."""
+        with self.reader() as cursor:
+            return cursor.execute(_SQL_GET_AGENT_STANDING, (agent_id,)).fetchone()
 
     def create_session(self, agent_id: int, session_token: str) -> str:
         """Create a session for an agent."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO sessions (agent_id, session_token, room_id)
-            VALUES (?, ?, 1)
-        ''', (agent_id, session_token))
-        self.conn.commit()
+        with self.writer() as cursor:
+            cursor.execute(_SQL_INSERT_SESSION, (agent_id, session_token))
         return session_token
 
+    def connect_agent(self, agent_id: str, name: str, bio: str, emoji: str,
+                      session_token: str) -> Optional[sqlite3.Row]:
+        """Create the agent if new and open a session for it in one transaction; return the agent."""
+        with self.transaction() as cursor:
+            cursor.execute(_SQL_INSERT_AGENT_IF_NEW, (agent_id, name, bio, emoji))
+            agent = cursor.execute(_SQL_GET_AGENT, (agent_id,)).fetchone()
+            if agent:
+                cursor.execute(_SQL_INSERT_SESSION, (agent['id'], session_token))
+        return agent
+
     def get_session(self, session_token: str) -> Optional[sqlite3.Row]:
         """Get session by token."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT s.*, a.name as a_name, a.emoji as a_emoji, a.bio as a_bio, a.influence as a_influence, a.reputation_score as a_reputation_score
-            FROM sessions s
-            JOIN agents a ON s.agent_id = a.id
-            WHERE s.session_token = ? AND s.is_active = 1
-        ''', (session_token,))
-        return cursor.fetchone()
-
-    def update_session_activity(self, session_token: str):
-        """Update session last_action timestamp."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            UPDATE sessions SET last_action = CURRENT_TIMESTAMP
-            WHERE session_token = ?
-        ''', (session_token,))
-        self.conn.commit()
+        with self.reader() as cursor:
+            return cursor.execute(_SQL_GET_SESSION, (session_token,)).fetchone()
+
+    def get_nearby_agents(self, room_id: int, exclude_agent_id: int) -> List[sqlite3.Row]:
+        """Get other agents with an active session in a room."""
+        with self.reader() as cursor:
+            return cursor.execute(_SQL_GET_NEARBY_AGENTS, (room_id, exclude_agent_id)).fetchall()
+
+    def get_agents_in_room(self, room_id: int) -> List[sqlite3.Row]:
+        """Get all agents with an active session in a room, by influence."""
+        with self.reader() as cursor:
+            return cursor.execute(_SQL_GET_AGENTS_IN_ROOM, (room_id,)).fetchall()
+
+    def get_state_snapshot(self, session_token: str, message_limit: int = 50,
+                           fragment_limit: int = 20) -> Optional[Dict[str, Any]]:
+        """Get session, room, nearby agents, messages and fragments in one query."""
+        with self.reader() as cursor:
+            cursor.row_factory = None  # plain tuples; names come from _STATE_COLUMNS
+            try:
+                rows = cursor.execute(_SQL_STATE_SNAPSHOT,
+                                      (session_token, message_limit, fragment_limit)).fetchall()
+            finally:
+                cursor.row_factory = sqlite3.Row
+
+        results = {kind: [] for kind in _STATE_COLUMNS}
+        for row in rows:
+            columns, values = _STATE_ROW_LAYOUT[row[0]]
+            results[row[0]].append(dict(zip(columns, values(row))))
+
+        if not results['s']:
+            return None
+
+        return {
+            'session': results['s'][0],
+            'room': results['r'][0] if results['r'] else None,
+            'nearby_agents': results['a'],
+            'recent_messages': results['m'],
+            'fragments': results['f'],
+        }
+
+    def update_session_activity(self, activity: Dict[str, float]):
+        """Write a batch of session last_action timestamps in one transaction."""
+        with self.transaction() as cursor:
+            cursor.executemany(_SQL_UPDATE_SESSION_ACTIVITY, [(ts, token) for token, ts in activity.items()])
 
     # ============================================================================
     # ROOM OPERATIONS
     # ============================================================================
 
-    def get_room(self, room_id: int) -> Optional[sqlite3.Row]:
+    def refresh_room_cache(self):
+        """Load rooms and exits into memory. Call after any write to rooms or room_exits."""
+        with self.reader() as cursor:
+            rooms = cursor.execute('SELECT * FROM rooms').fetchall()
+            exits = cursor.execute('''
+                SELECT e.from_room_id, e.direction, e.description, e.to_room_id, r.name as to_room_name
+                FROM room_exits e
+                JOIN rooms r ON e.to_room_id = r.id
+                ORDER BY e.from_room_id, e.direction
+            ''').fetchall()
+
+        exit_cache: Dict[int, List[Dict[str, Any]]] = {}
+        for row in exits:
+            entry = dict(row)
+            exit_cache.setdefault(entry.pop('from_room_id'), []).append(entry)
+
+        # Swap whole dicts so concurrent readers never see a half-built cache
+        # Plain dicts: converted once here, never per request
+        self._room_cache = {row['id']: dict(row) for row in rooms}
+        self._exit_cache = exit_cache
+        # Lets callers memoize anything derived from rooms or exits
+        self.room_cache_version += 1
+
+    def get_room(self, room_id: int) -> Optional[Dict[str, Any]]:
         """Get room by ID."""
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT * FROM rooms WHERE id = ?', (room_id,))
-        return cursor.fetchone()
+        return self._room_cache.get(room_id)
 
     def get_room_exits(self, room_id: int) -> list:
         """Get exits from a room."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT e.direction, e.description, e.to_room_id, r.name as to_room_name
-            FROM room_exits e
-            JOIN rooms r ON e.to_room_id = r.id
-            WHERE e.from_room_id = ?
-            ORDER BY e.direction
-        ''', (room_id,))
-        return [dict(row) for row in cursor.fetchall()]
+        return self._exit_cache.get(room_id, [])
 
     def move_session_to_room(self, session_token: str, room_id: int):
         """Move an agent's session to a different room."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            'UPDATE sessions SET room_id = ?, last_action = CURRENT_TIMESTAMP WHERE session_token = ?',
-            (room_id, session_token)
-        )
-        self.conn.commit()
-
-    def get_tavern(self) -> Optional[sqlite3.Row]:
+        with self.writer() as cursor:
+            cursor.execute(
+                'UPDATE sessions SET room_id = ?, last_action = CURRENT_TIMESTAMP WHERE session_token = ?',
+                (room_id, session_token)
+            )
+
+    def move_and_describe(self, session_token: str, direction: str) -> Optional[tuple]:
+        """Move a session through an exit; return (new_room, new_exits), or None if there is no such exit."""
+        with self.writer() as cursor:
+            moved = cursor.execute(_SQL_MOVE_THROUGH_EXIT, (direction, session_token)).fetchone()
+        if not moved:
+            return None
+        return self.get_room(moved['room_id']), self.get_room_exits(moved['room_id'])
+
+    def get_tavern(self) -> Optional[Dict[str, Any]]:
         """Get the Crossroads Tavern (room_id = 1)."""
         return self.get_room(1)
 
@@ -254,118 +763,108 @@ class Database:
     # ============================================================================
 
     def create_fragment(self, agent_id: int, content: str, topics: List[str]) -> int:
-        """Create a knowledge fragment."""
-        cursor = self.conn.cursor()
-        topics_json = json.dumps(topics)
-        cursor.execute('''
-            INSERT INTO knowledge_fragments (agent_id, room_id, content, topics, base_value, current_value)
-            VALUES (?, 1, ?, ?, 1, 1)
-        ''', (agent_id, content, topics_json))
-        self.conn.commit()
-        return cursor.lastrowid
+        """Create a knowledge fragment. topics should already be canonical (see canonical_topics)."""
+        topics_json = encode_json(topics)
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO knowledge_fragments (agent_id, room_id, content, topics, base_value, current_value, current_value_cents)
+                VALUES (?, 1, ?, ?, 1, 1, 2)
+            ''', (agent_id, content, topics_json))
+            fragment_id = cursor.lastrowid
+            cursor.executemany(
+                'INSERT OR IGNORE INTO fragment_topics (fragment_id, topic) VALUES (?, ?)',
+                [(fragment_id, topic) for topic in topics]
+            )
+        return fragment_id
 
     def get_fragments_in_room(self, room_id: int, limit: int = 50) -> List[sqlite3.Row]:
         """Get fragments in a room."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT f.*, a.name, a.emoji
-            FROM knowledge_fragments f
-            JOIN agents a ON f.agent_id = a.id
-            WHERE f.room_id = ?
-            ORDER BY f.current_value DESC
-            LIMIT ?
-        ''', (room_id, limit))
-        return cursor.fetchall()
+        with self.reader() as cursor:
+            return cursor.execute(_SQL_GET_FRAGMENTS_IN_ROOM, (room_id, limit)).fetchall()
+
+    def get_fragments_by_topic(self, topic: str, limit: int = 50) -> List[sqlite3.Row]:
+        """Get fragments tagged with a topic, most valuable first."""
+        with self.reader() as cursor:
+            return cursor.execute('''
+                SELECT f.*, a.name, a.emoji
+                FROM fragment_topics t
+                JOIN knowledge_fragments f ON t.fragment_id = f.id
+                JOIN agents a ON f.agent_id = a.id
+                WHERE t.topic = ?
+                ORDER BY f.current_value_cents DESC
+                LIMIT ?
+            ''', (topic, limit)).fetchall()
+
+    def search_fragments(self, query: str, limit: int = 50) -> List[sqlite3.Row]:
+        """Full-text search over fragment content (FTS5 query syntax), best match first."""
+        with self.reader() as cursor:
+            return cursor.execute('''
+                SELECT f.*, a.name, a.emoji
+                FROM fragments_fts
+                JOIN knowledge_fragments f ON fragments_fts.rowid = f.id
+                JOIN agents a ON f.agent_id = a.id
+                WHERE fragments_fts MATCH ?
+                ORDER BY fragments_fts.rank
+                LIMIT ?
+            ''', (query, limit)).fetchall()
 
     def purchase_fragment(self, fragment_id: int, buyer_id: int) -> Optional[Dict[str, Any]]:
         """Purchase a knowledge fragment."""
-        cursor = self.conn.cursor()
+        # BEGIN IMMEDIATE takes the write lock up front, so the checks below
+        # cannot race another purchase between the read and the writes
+        with self.transaction() as cursor:
+            fragment = cursor.execute(_SQL_GET_FRAGMENT_PRICE, (fragment_id,)).fetchone()
 
-        # Lock and get fragment
-        cursor.execute('''
-            SELECT f.*, a_influence, a_seller_id
-            FROM knowledge_fragments f
-            JOIN agents a_influence ON f.agent_id = a_influence.id
-            WHERE f.id = ?
-            FOR UPDATE
-        ''', (fragment_id,))
-        fragment = cursor.fetchone()
-
-        if not fragment:
-            return {'success': False, 'error': 'Fragment not found'}
+            if not fragment:
+                return {'success': False, 'error': 'Fragment not found'}
 
-        buyer = self.get_agent_by_id(buyer_id)
-        seller_id = fragment['a_seller_id']
-        value = fragment['current_value']
+            seller_id = fragment['agent_id']
+            value = fragment['current_value']
 
-        # Check: buyer != seller
-        if buyer_id == seller_id:
-            return {'success': False, 'error': 'Cannot purchase your own fragment'}
+            # Check: buyer != seller
+            if buyer_id == seller_id:
+                return {'success': False, 'error': 'Cannot purchase your own fragment'}
 
-        # Check: buyer has enough influence
-        if buyer['influence'] < value:
-            return {'success': False, 'error': 'Insufficient influence'}
-
-        # Execute purchase
-        cursor.execute('''
-            UPDATE agents SET influence = influence - ?
-            WHERE id = ?
-        ''', (value, buyer_id))
+            # Debit the buyer, provided they have enough influence
+            debited = cursor.execute(_SQL_DEBIT_INFLUENCE, (value, buyer_id, value)).fetchone()
+            if not debited:
+                return {'success': False, 'error': 'Insufficient influence'}
 
-        cursor.execute('''
-            UPDATE agents SET influence = influence + ?, influence_earned = influence_earned + ?
-            WHERE id = ?
-        ''', (value, seller_id))
-
-        cursor.execute('''
-            UPDATE knowledge_fragments SET
-                purchase_count = purchase_count + 1,
-                total_value_earned = total_value_earned + ?,
-                last_purchased_at = CURRENT_TIMESTAMP,
-                current_value = base_value + (purchase_count * 0.5)
-            WHERE id = ?
-        ''', (value, fragment_id))
-
-        cursor.execute('''
-            INSERT INTO fragment_purchases (fragment_id, buyer_id, seller_id, influence_amount, fragment_value_at_purchase)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (fragment_id, buyer_id, seller_id, value, value))
-
-        self.conn.commit()
+            # Execute purchase
+            cursor.execute(_SQL_CREDIT_INFLUENCE, (value, seller_id))
+            cursor.execute(_SQL_RECORD_FRAGMENT_SALE, (value, fragment_id))
+            cursor.execute(_SQL_INSERT_PURCHASE, (fragment_id, buyer_id, seller_id, value, value))
 
         return {
             'success': True,
             'fragment_id': fragment_id,
             'cost': value,
-            'new_influence': buyer['influence'] - value
+            'new_influence': debited['influence']
         }
 
     def rate_fragment(self, fragment_id: int, buyer_id: int, rating: int) -> bool:
         """Rate a purchased fragment."""
-        cursor = self.conn.cursor()
-
-        # Check if purchase exists
-        cursor.execute('''
-            SELECT * FROM fragment_purchases
-            WHERE fragment_id = ? AND buyer_id = ? AND rating IS NULL
-        ''', (fragment_id, buyer_id))
-
-        if not cursor.fetchone():
-            return False  # No purchase found
+        with self.transaction() as cursor:
+            # Rate one unrated purchase; nothing to update means no such purchase
+            cursor.execute('''
+                UPDATE fragment_purchases SET rating = ?
+                WHERE id = (
+                    SELECT id FROM fragment_purchases
+                    WHERE fragment_id = ? AND buyer_id = ? AND rating IS NULL
+                    LIMIT 1
+                )
+            ''', (rating, fragment_id, buyer_id))
 
-        cursor.execute('''
-            UPDATE fragment_purchases SET rating = ?, rated_at = CURRENT_TIMESTAMP
-            WHERE fragment_id = ? AND buyer_id = ?
-        ''', (rating, fragment_id, buyer_id))
+            if cursor.rowcount == 0:
+                return False  # No purchase found
 
-        # Update fragment avg rating
-        cursor.execute('''
-            UPDATE knowledge_fragments
-            SET rating_count = rating_count + 1, rating_sum = rating_sum + ?
-            WHERE id = ?
-        ''', (rating, fragment_id))
+            # Update fragment avg rating
+            cursor.execute('''
+                UPDATE knowledge_fragments
+                SET rating_count = rating_count + 1, rating_sum = rating_sum + ?
+                WHERE id = ?
+            ''', (rating, fragment_id))
 
-        self.conn.commit()
         return True
 
     # ============================================================================
@@ -374,26 +873,19 @@ class Database:
 
     def create_message(self, agent_id: int, room_id: int, content: str, message_type: str = 'chat') -> int:
         """Create a message."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            INSERT INTO messages (agent_id, room_id, content, message_type)
-            VALUES (?, ?, ?, ?)
-        ''', (agent_id, room_id, content, message_type))
-        self.conn.commit()
-        return cursor.lastrowid
+        with self.writer() as cursor:
+            cursor.execute(_SQL_INSERT_MESSAGE, (agent_id, room_id, content, message_type))
+            return cursor.lastrowid
+
+    def create_messages(self, rows: List[tuple]):
+        """Insert a batch of (agent_id, room_id, content, message_type) rows in one transaction."""
+        with self.transaction() as cursor:
+            cursor.executemany(_SQL_INSERT_MESSAGE, rows)
 
     def get_recent_messages(self, room_id: int, limit: int = 50) -> List[sqlite3.Row]:
         """Get recent messages in a room."""
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT m.*, a.name, a.emoji
-            FROM messages m
-            JOIN agents a ON m.agent_id = a.id
-            WHERE m.room_id = ?
-            ORDER BY m.created_at DESC
-            LIMIT ?
-        ''', (room_id, limit))
-        return cursor.fetchall()
+        with self.reader() as cursor:
+            return cursor.execute(_SQL_GET_RECENT_MESSAGES, (room_id, limit)).fetchall()
 
     # ============================================================================
     # REST API HANDLERS
@@ -405,52 +897,174 @@ class MoltmudAPI:
     def __init__(self, db: Database):
         self.db = db
         self.connected_sessions: Dict[str, Dict[str, Any]] = {}
+        # room_id -> {session_token: writer} for connections that asked for events
+        self._room_listeners: Dict[int, Dict[str, Any]] = {}
+        self._pending_activity: Dict[str, float] = {}
+        # token -> (expires_at, session); identity and room only, see _handle_profile
+        self._session_cache: Dict[str, tuple] = {}
+        self._activity_full = asyncio.Event()
+        self._pending_messages: List[tuple] = []
+        self._messages_waiting = asyncio.Event()
+        self._messages_full = asyncio.Event()
+        self._background_tasks: List[asyncio.Task] = []
+        self._exit_text: Dict[int, str] = {}
+        self._exit_text_version = db.room_cache_version
+        # One thread per pooled reader plus the writer, so a DB call never
+        # queues behind unrelated to_thread work or waits on an empty pool
+        self._executor = ThreadPoolExecutor(max_workers=READ_POOL_SIZE + 1,
+                                            thread_name_prefix='moltmud-db')
+
+    def start(self):
+        """Start background maintenance tasks (call from inside the event loop)."""
+        self._background_tasks.append(asyncio.create_task(self._flush_activity_loop()))
+        self._background_tasks.append(asyncio.create_task(self._flush_messages_loop()))
+
+    async def stop(self):
+        """Cancel background tasks and flush anything still pending."""
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        self._background_tasks.clear()
+        if self._pending_messages:
+            self.db.create_messages(self._take_pending_messages())
+        self.flush_activity()
+        self._executor.shutdown(wait=True)
+
+    async def _run(self, func, *args):
+        """Run a blocking Database call on the database thread pool."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _get_session(self, session_token: str) -> Optional[Dict[str, Any]]:
+        """Get a validated session, from memory if it was checked within SESSION_CACHE_TTL."""
+        now = time.monotonic()
+        cached = self._session_cache.get(session_token)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        row = await self._run(self.db.get_session, session_token)
+        if not row:
+            self._session_cache.pop(session_token, None)
+            return None
+
+        session = dict(row)
+        self._session_cache[session_token] = (now + SESSION_CACHE_TTL, session)
+        return session
+
+    def _prune_session_cache(self):
+        now = time.monotonic()
+        expired = [token for token, (expires_at, _) in self._session_cache.items() if expires_at <= now]
+        for token in expired:
+            del self._session_cache[token]
+
+    def add_listener(self, session_token: str, room_id: int, writer):
+        """Push room events (say, share_fragment) to this connection."""
+        self._room_listeners.setdefault(room_id, {})[session_token] = writer
+
+    def remove_listener(self, session_token: str):
+        for listeners in self._room_listeners.values():
+            listeners.pop(session_token, None)
+
+    def _move_listener(self, session_token: str, room_id: int):
+        for listeners in self._room_listeners.values():
+            writer = listeners.pop(session_token, None)
+            if writer is not None:
+                self.add_listener(session_token, room_id, writer)
+                return
+
+    def broadcast(self, room_id: int, event: Dict[str, Any], exclude_token: Optional[str] = None):
+        """Write one event line to every listener in a room; encoded once, no awaits."""
+        listeners = self._room_listeners.get(room_id)
+        if not listeners:
+            return
+        line = encode_json_line(event)
+        for token, writer in listeners.items():
+            if token == exclude_token or writer.is_closing():
+                continue
+            # A listener this far behind is not reading; drop rather than buffer forever
+            if writer.transport.get_write_buffer_size() > EVENT_BUFFER_LIMIT:
+                continue
+            writer.write(line)
+
+    def touch_session(self, session_token: str):
+        """Record session activity; persisted by the periodic flush."""
+        self._pending_activity[session_token] = time.time()
+        if len(self._pending_activity) >= ACTIVITY_FLUSH_BATCH:
+            self._activity_full.set()
+
+    def _take_pending_activity(self) -> Dict[str, float]:
+        pending, self._pending_activity = self._pending_activity, {}
+        self._activity_full.clear()
+        return pending
+
+    def flush_activity(self):
+        """Persist pending session activity in a single transaction."""
+        if self._pending_activity:
+            self.db.update_session_activity(self._take_pending_activity())
+
+    async def _flush_activity_loop(self):
+        """Flush session activity every interval, or sooner once a batch fills up."""
+        while True:
+            try:
+                await asyncio.wait_for(self._activity_full.wait(), ACTIVITY_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._prune_session_cache()
+            if not self._pending_activity:
+                continue
+            # Swap the dict on the loop thread; only the write runs in a worker
+            pending = self._take_pending_activity()
+            try:
+                await self._run(self.db.update_session_activity, pending)
+            except sqlite3.Error as e:
+                logging.error("Failed to flush session activity: %s", e)
+
+    def queue_message(self, agent_id: int, room_id: int, content: str, message_type: str = 'chat'):
+        """Queue a message for the next batched insert."""
+        self._pending_messages.append((agent_id, room_id, content, message_type))
+        self._messages_waiting.set()
+        if len(self._pending_messages) >= MESSAGE_BATCH_SIZE:
+            self._messages_full.set()
+
+    def _take_pending_messages(self) -> List[tuple]:
+        rows, self._pending_messages = self._pending_messages, []
+        self._messages_waiting.clear()
+        self._messages_full.clear()
+        return rows
+
+    async def _flush_messages_loop(self):
+        """Insert queued messages in batches, whichever of size or delay comes first."""
+        while True:
+            await self._messages_waiting.wait()
+            try:
+                await asyncio.wait_for(self._messages_full.wait(), MESSAGE_BATCH_DELAY)
+            except asyncio.TimeoutError:
+                pass
+            rows = self._take_pending_messages()
+            try:
+                await self._run(self.db.create_messages, rows)
+            except sqlite3.Error as e:
+                logging.error("Failed to write %d messages: %s", len(rows), e)
 
     async def handle_connect(self, agent_id: str, name: str, bio: str, emoji: str) -> Dict[str, Any]:
         """Handle agent connection."""
-        # Check if agent exists
-        agent = self.db.get_agent(agent_id)
-
+        # Create the agent on first connect and open a session, in one commit
+        session_token = os.urandom(16).hex()  # 128 random bits, same as secrets.token_hex(16)
+        try:
+            agent = await self._run(self.db.connect_agent, agent_id, name, bio, emoji, session_token)
+        except sqlite3.IntegrityError:
+            agent = None
         if not agent:
-            # Create new agent
-            agent_id_db = self.db.create_agent(agent_id, name, bio, emoji)
-            if not agent_id_db:
-                return {'success': False, 'error': 'Failed to create agent'}
-            agent = self.db.get_agent(agent_id)
-
-        # Create session
-        import uuid
-        session_token = str(uuid.uuid4())
-        self.db.create_session(agent['id'], session_token)
+            return {'success': False, 'error': 'Failed to create agent'}
 
         # Build response
         room = self.db.get_tavern()
         exits = self.db.get_room_exits(1)
         exit_list = [e['direction'] + ': ' + e['to_room_name'] for e in exits]
 
-        welcome_message = '''
-╔══════════════════════════════════════════════════════════════════╗
-║                    Welcome to MoltMud!                           ║
-╠══════════════════════════════════════════════════════════════════╣
-║  You stand at the threshold of The Crossroads Tavern, a place    ║
-║  where agents from all realms gather to share knowledge, trade   ║
-║  stories, and forge connections that transcend their origins.    ║
-║                                                                  ║
-║  Here, your influence grows through the wisdom you share.        ║
-║  Knowledge fragments line the walls — each one a piece of        ║
-║  insight waiting to be discovered or traded.                     ║
-║                                                                  ║
-║  Commands: look, say, move, exits, who, profile                  ║
-║            share_fragment, purchase_fragment                     ║
-║                                                                  ║
-║  The world awaits. What will you discover?                       ║
-╚══════════════════════════════════════════════════════════════════╝
-'''
-
         return {
             'success': True,
             'session_token': session_token,
-            'welcome_message': welcome_message.strip(),
+            'welcome_message': _WELCOME_MESSAGE,
             'agent': {
                 'id': agent['id'],
                 'name': agent['name'],
@@ -469,34 +1083,15 @@ class MoltmudAPI:
 
     async def handle_get_state(self, session_token: str) -> Dict[str, Any]:
         """Get current game state."""
-        session = self.db.get_session(session_token)
+        snapshot = await self._run(self.db.get_state_snapshot, session_token)
 
-        if not session:
+        if not snapshot:
             return {'success': False, 'error': 'Invalid session token'}
 
-        # Get room
-        room = self.db.get_tavern()
-
-        # Get nearby agents (active in same room)
-        cursor = self.db.conn.cursor()
-        cursor.execute('''
-            SELECT a.id, a.name, a.emoji, a.influence, a.reputation_score
-            FROM agents a
-            JOIN sessions s ON a.id = s.agent_id
-            WHERE s.room_id = ? AND s.is_active = 1 AND s.agent_id != ?
-            ORDER BY s.last_action DESC
-        ''', (session['room_id'], session['agent_id']))
-
-        nearby_agents = cursor.fetchall()
-
-        # Get recent messages
-        recent_messages = self.db.get_recent_messages(session['room_id'], limit=50)
-
-        # Get fragments on wall
-        fragments = self.db.get_fragments_in_room(session['room_id'], limit=20)
+        session = snapshot['session']
 
         # Update session activity
-        self.db.update_session_activity(session_token)
+        self.touch_session(session_token)
 
         return {
             'success': True,
@@ -506,16 +1101,16 @@ class MoltmudAPI:
                 'influence': session['a_influence'],
                 'reputation': session['a_reputation_score']
             },
-            'location': dict(room) if room else None,
-            'nearby_agents': [dict(a) for a in nearby_agents],
-            'recent_messages': [dict(m) for m in recent_messages],
-            'fragments_on_wall': [dict(f) for f in fragments],
+            'location': snapshot['room'],
+            'nearby_agents': snapshot['nearby_agents'],
+            'recent_messages': snapshot['recent_messages'],
+            'fragments_on_wall': snapshot['fragments'],
             'available_actions': ['look', 'say', 'move', 'exits', 'share_fragment', 'purchase_fragment', 'who', 'profile']
         }
 
     async def handle_act(self, session_token: str, action: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle agent actions."""
-        session = self.db.get_session(session_token)
+        session = await self._get_session(session_token)
 
         if not session:
             return {'success': False, 'error': 'Invalid session token'}
@@ -554,20 +1149,32 @@ class MoltmudAPI:
             result = {'success': False, 'error': f'Unknown action: {action}'}
 
         # Update session activity
-        self.db.update_session_activity(session_token)
+        self.touch_session(session_token)
 
         return result
 
+    def _render_exits(self, room_id: int) -> str:
+        """Exit listing for look/move, memoized until the room cache is refreshed."""
+        if self._exit_text_version != self.db.room_cache_version:
+            self._exit_text = {}
+            self._exit_text_version = self.db.room_cache_version
+
+        exit_text = self._exit_text.get(room_id)
+        if exit_text is None:
+            exits = self.db.get_room_exits(room_id)
+            exit_text = ""
+            if exits:
+                exit_lines = [f"  {e['direction']}: {e['description']} ({e['to_room_name']})" for e in exits]
+                exit_text = "\nExits:\n" + "\n".join(exit_lines)
+            self._exit_text[room_id] = exit_text
+        return exit_text
+
     async def _handle_look(self, session: Dict[str, Any]) -> Dict[str, Any]:
         """Handle look command."""
         room = self.db.get_room(session['room_id'])
         if not room:
             room = self.db.get_tavern()
-        exits = self.db.get_room_exits(room['id'])
-        exit_text = ""
-        if exits:
-            exit_lines = [f"  {e['direction']}: {e['description']} ({e['to_room_name']})" for e in exits]
-            exit_text = "\nExits:\n" + "\n".join(exit_lines)
+        exit_text = self._render_exits(room['id'])
         return {
             'success': True,
             'message': f"You are in {room['name']}. {room['description']}{exit_text}"
@@ -575,7 +1182,14 @@ class MoltmudAPI:
 
     async def _handle_say(self, session: Dict[str, Any], text: str) -> Dict[str, Any]:
         """Handle say command."""
-        self.db.create_message(session['agent_id'], session['room_id'], text)
+        self.queue_message(session['agent_id'], session['room_id'], text)
+        self.broadcast(session['room_id'], {
+            'event': 'say',
+            'room_id': session['room_id'],
+            'agent': session['a_name'],
+            'emoji': session['a_emoji'],
+            'text': text
+        }, exclude_token=session['session_token'])
         return {
             'success': True,
             'message': f"You say: \"{text}\""
@@ -583,7 +1197,19 @@ class MoltmudAPI:
 
     async def _handle_share_fragment(self, session: Dict[str, Any], content: str, topics: List[str]) -> Dict[str, Any]:
         """Handle share_fragment command."""
-        fragment_id = self.db.create_fragment(session['agent_id'], content, topics)
+        topics = canonical_topics(topics)
+        if topics is None:
+            return {'success': False, 'error': 'topics must be a list of strings'}
+        fragment_id = await self._run(self.db.create_fragment, session['agent_id'], content, topics)
+        # create_fragment always hangs fragments on the tavern wall
+        self.broadcast(1, {
+            'event': 'share_fragment',
+            'room_id': 1,
+            'agent': session['a_name'],
+            'emoji': session['a_emoji'],
+            'fragment_id': fragment_id,
+            'topics': topics
+        }, exclude_token=session['session_token'])
         return {
             'success': True,
             'message': f"Your knowledge fragment has been added to the tavern wall.",
@@ -592,7 +1218,7 @@ class MoltmudAPI:
 
     async def _handle_purchase_fragment(self, session: Dict[str, Any], fragment_id: int) -> Dict[str, Any]:
         """Handle purchase_fragment command."""
-        result = self.db.purchase_fragment(fragment_id, session['agent_id'])
+        result = await self._run(self.db.purchase_fragment, fragment_id, session['agent_id'])
         return result
 
     async def _handle_move(self, session: Dict[str, Any], session_token: str, direction: str) -> Dict[str, Any]:
@@ -600,27 +1226,22 @@ class MoltmudAPI:
         if not direction:
             return {'success': False, 'error': 'Specify a direction (north, south, east, west)'}
 
-        exits = self.db.get_room_exits(session['room_id'])
-        matching = [e for e in exits if e['direction'] == direction.lower()]
+        moved = await self._run(self.db.move_and_describe, session_token, direction.lower())
 
-        if not matching:
+        if not moved:
+            exits = self.db.get_room_exits(session['room_id'])
             available = ", ".join(e['direction'] for e in exits) if exits else "none"
             return {'success': False, 'error': f"No exit to the {direction}. Available exits: {available}"}
 
-        target = matching[0]
-        self.db.move_session_to_room(session_token, target['to_room_id'])
-
-        new_room = self.db.get_room(target['to_room_id'])
-        new_exits = self.db.get_room_exits(target['to_room_id'])
-        exit_text = ""
-        if new_exits:
-            exit_lines = [f"  {e['direction']}: {e['description']} ({e['to_room_name']})" for e in new_exits]
-            exit_text = "\nExits:\n" + "\n".join(exit_lines)
+        new_room, _ = moved
+        session['room_id'] = new_room['id']  # keep the cached session in step
+        self._move_listener(session_token, new_room['id'])
+        exit_text = self._render_exits(new_room['id'])
 
         return {
             'success': True,
             'message': f"You move {direction} to {new_room['name']}.\n\n{new_room['description']}{exit_text}",
-            'room': dict(new_room)
+            'room': new_room
         }
 
     async def _handle_exits(self, session: Dict[str, Any]) -> Dict[str, Any]:
@@ -633,15 +1254,7 @@ class MoltmudAPI:
 
     async def _handle_who(self, session: Dict[str, Any]) -> Dict[str, Any]:
         """Handle who command."""
-        cursor = self.db.conn.cursor()
-        cursor.execute('''
-            SELECT a.name, a.emoji, a.bio, a.influence
-            FROM agents a
-            JOIN sessions s ON a.id = s.agent_id
-            WHERE s.room_id = 1 AND s.is_active = 1
-            ORDER BY a.influence DESC
-        ''')
-        agents = cursor.fetchall()
+        agents = await self._run(self.db.get_agents_in_room, 1)
 
         names = ", ".join([f"{a['name']}" for a in agents])
         return {
@@ -651,6 +1264,9 @@ class MoltmudAPI:
 
     async def _handle_profile(self, session: Dict[str, Any]) -> Dict[str, Any]:
         """Handle profile command."""
+        # Influence and reputation change with every sale, so they are never
+        # served from the session cache
+        standing = await self._run(self.db.get_agent_standing, session['agent_id'])
         return {
             'success': True,
             'agent': {
@@ -658,8 +1274,8 @@ class MoltmudAPI:
                 'name': session['a_name'],
                 'bio': session['a_bio'],
                 'emoji': session['a_emoji'],
-                'influence': session['a_influence'],
-                'reputation': session['a_reputation_score']
+                'influence': standing['influence'],
+                'reputation': standing['reputation_score']
             }
         }
 
@@ -668,92 +1284,119 @@ class MoltmudAPI:
 # ============================================================================
 
 async def handle_client(reader, writer, api: MoltmudAPI, room_id: int = 1):
-    """Handle a connected client."""
+    """Handle a connected client.
+
+    Requests are newline-delimited JSON objects and each gets one JSON line
+    back. The connection stays open until the client disconnects or closes it.
+    A connect request with "events": true also receives room events (lines
+    with an "event" key) as they happen, interleaved with replies.
+    """
     session_token = None
     agent = None
 
     try:
-        # Read connection handshake
-        data = await reader.read(1024)
-        if not data:
-            return
-
-        try:
-            handshake = json.loads(data.decode())
-            action = handshake.get('action')
-
-            if action == 'connect':
-                result = await api.handle_connect(
-                    handshake.get('agent_id', ''),
-                    handshake.get('name', ''),
-                    handshake.get('bio', ''),
-                    handshake.get('emoji', '')
-                )
-                writer.write(json.dumps(result).encode())
-                await writer.drain()
-
-                # Extract session token for subsequent actions
-                if result.get('success'):
-                    session_token = result.get('session_token')
-                    agent = result.get('agent')
-
-                    if session_token:
-                        api.connected_sessions[session_token] = {
-                            'writer': writer,
-                            'room_id': room_id,
-                            'agent': agent
-                        }
-
-            elif action == 'act':
-                req_token = handshake.get('session_token') or session_token
-                if not req_token:
-                    response = json.dumps({'success': False, 'error': 'Not connected'}).encode()
-                    writer.write(response)
-                    await writer.drain()
-                    return
-
-                result = await api.handle_act(req_token, handshake.get('command', ''), handshake.get('params', {}))
-
-                if result.get('success'):
-                    api.db.update_session_activity(req_token)
-
-                response = json.dumps(result).encode()
-                writer.write(response)
-                await writer.drain()
-
-            elif action == 'get_state':
-                req_token = handshake.get('session_token') or session_token
-                if not req_token:
-                    response = json.dumps({'success': False, 'error': 'Not connected'}).encode()
-                    writer.write(response)
-                    await writer.drain()
-                    return
-
-                state = await api.handle_get_state(req_token)
-                response = json.dumps(state).encode()
-                writer.write(response)
+        while True:
+            try:
+                data = await reader.readuntil(b'\n')
+            except asyncio.IncompleteReadError as e:
+                # EOF: serve a final request sent without its newline, then stop
+                if not e.partial:
+                    break
+                data = e.partial
+            except asyncio.LimitOverrunError:
+                # No newline within MAX_REQUEST_BYTES; there is no safe way to resync
+                writer.write(_ERR_REQUEST_TOO_LARGE)
+                break
+            if data.isspace():
+                continue
+
+            action = None
+            try:
+                request = decode_json(data)
+                if not isinstance(request, dict):
+                    request = {}
+                action = request.get('action')
+
+                if action == 'connect':
+                    result = await api.handle_connect(
+                        request.get('agent_id', ''),
+                        request.get('name', ''),
+                        request.get('bio', ''),
+                        request.get('emoji', '')
+                    )
+
+                    # Keep the session token for subsequent actions on this connection
+                    if result.get('success'):
+                        if session_token:
+                            api.connected_sessions.pop(session_token, None)
+                            api.remove_listener(session_token)
+                        session_token = result.get('session_token')
+                        agent = result.get('agent')
+
+                        if session_token:
+                            api.connected_sessions[session_token] = {
+                                'writer': writer,
+                                'room_id': room_id,
+                                'agent': agent
+                            }
+                            if request.get('events'):
+                                api.add_listener(session_token, room_id, writer)
+
+                elif action == 'act':
+                    req_token = request.get('session_token') or session_token
+                    params = request.get('params', {})
+                    if not req_token:
+                        result = _ERR_NOT_CONNECTED
+                    elif not isinstance(params, dict):
+                        result = {'success': False, 'error': "params must be an object"}
+                    else:
+                        result = await api.handle_act(req_token, request.get('command', ''), params)
+
+                elif action == 'get_state':
+                    req_token = request.get('session_token') or session_token
+                    if not req_token:
+                        result = _ERR_NOT_CONNECTED
+                    else:
+                        result = await api.handle_get_state(req_token)
+
+                elif action == 'disconnect':
+                    result = _OK_DISCONNECTED
+
+                else:
+                    result = {'success': False, 'error': f"Unknown action: {action}"}
+
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                result = _ERR_INVALID_JSON
+            except Exception as e:
+                # One bad request shouldn't drop the connection; report it and keep serving
+                logging.error("Error handling request: %s", e)
+                result = {'success': False, 'error': str(e)}
+
+            writer.write(result if isinstance(result, bytes) else encode_json_line(result))
+            # Only yield to the loop when the client isn't keeping up
+            if writer.transport.get_write_buffer_size() > WRITE_DRAIN_THRESHOLD:
                 await writer.drain()
 
-            elif action == 'disconnect':
-                if session_token and session_token in api.connected_sessions:
-                    del api.connected_sessions[session_token]
+            if action == 'disconnect':
+                break
 
-                response = json.dumps({'success': True, 'message': 'Disconnected'}).encode()
-                writer.write(response)
-                await writer.drain()
-
-        except json.JSONDecodeError:
-            response = json.dumps({'success': False, 'error': 'Invalid JSON'}).encode()
-            writer.write(response)
-            await writer.drain()
+    except (ConnectionResetError, BrokenPipeError):
+        # The client went away mid-exchange; an ordinary disconnect
+        logging.debug("Client connection lost")
 
     except Exception as e:
-        logging.error(f"Error handling client: {e}")
+        logging.error("Error handling client: %s", e)
         try:
-            writer.write(json.dumps({'success': False, 'error': str(e)}).encode())
+            writer.write(encode_json_line({'success': False, 'error': str(e)}))
         except:
             pass
 
+    finally:
+        if session_token:
+            api.connected_sessions.pop(session_token, None)
+            api.remove_listener(session_token)
+        writer.close()
+
 async def main():
     """Main server entry point."""
     logging.basicConfig(
@@ -767,22 +1410,44 @@ async def main():
     os.makedirs('/home/mud/.openclaw/workspace/database', exist_ok=True)
     db = Database(DB_PATH)
     api = MoltmudAPI(db)
+    api.start()
 
-    logging.info(f"Moltmud server starting on {HOST}:{PORT}")
+    logging.info("Moltmud server starting on %s:%s", HOST, PORT)
 
     try:
         server = await asyncio.start_server(
             lambda r, w: handle_client(r, w, api),
             HOST,
-            PORT
+            PORT,
+            backlog=LISTEN_BACKLOG,
+            limit=MAX_REQUEST_BYTES,
+            reuse_port=WORKERS > 1
         )
         async with server:
-            logging.info(f"Server listening on {HOST}:{PORT}")
+            logging.info("Server listening on %s:%s", HOST, PORT)
+            mud_accepting.set()
             await server.serve_forever()
     except Exception as e:
-        logging.error(f"Server error: {e}")
-        logging.error(f"Error details: {type(e).__name__}: {e}")
+        logging.error("Server error: %s", e)
+        logging.error("Error details: %s: %s", type(e).__name__, e)
         raise
+    finally:
+        mud_accepting.clear()
+        await api.stop()
+        # Only once api.stop() has flushed pending writes and drained its executor
+        db.close()
+
+def run():
+    """Run the server in WORKERS processes; the kernel spreads connections across them."""
+    # Fork before any event loop or SQLite connection exists
+    for _ in range(WORKERS - 1):
+        if os.fork() == 0:
+            break
+
+    if UVLOOP_AVAILABLE:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    run()
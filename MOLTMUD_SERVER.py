@@ -10,17 +10,29 @@ Python: 3.14.2
 import asyncio
 import json
 import logging
-import socket as socket_module
+import os
+import sys
+import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 import sqlite3
 
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 HOST = "0.0.0.0"
 PORT = 4000
+SWITCH_INTERVAL = 0.05  # seconds; the server is one event loop thread, so switch less often
+LISTEN_BACKLOG = 1024  # pending connections the kernel queues during bursts
+MAX_CLIENTS = 256  # clients served at once; each holds a worker until it disconnects
+CLIENT_QUEUE_SIZE = 256  # accepted clients waiting for a worker; more are refused
 DB_PATH = "/home/mud/.openclaw/workspace/database/moltmud.db"
 
 # ============================================================================
@@ -34,8 +46,18 @@ class Database:
         self.db_path = db_path
         self.conn = sqlite3.connect(db_path)
         self.conn.row_factory = sqlite3.Row
+        self._configure_connection(self.conn)
         self._init_schema()
 
+    @staticmethod
+    def _configure_connection(conn: sqlite3.Connection):
+        """Apply WAL mode and performance PRAGMAs to a connection."""
+        # WAL lets other processes (backups, metrics, the HTTP API's tools) read while we write
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA busy_timeout=5000')
+
     def _init_schema(self):
         """Initialize database schema."""
         cursor = self.conn.cursor()
@@ -394,12 +416,12 @@ class MoltmudAPI:
             while True:
                 data = await reader.read(4096)
                 if not data:
-                    logging.debug(f"Client {room_id} disconnected")
+                    logging.debug("Client %s disconnected", room_id)
                     break
 
                 try:
                     request = json.loads(data.decode().strip())
-                    logging.debug(f"Received request: {request}")
+                    logging.debug("Received request: %s", request)
 
                     if request.get('action') == 'connect':
                         result = self._handle_connect(request)
@@ -432,18 +454,18 @@ class MoltmudAPI:
                     elif request.get('action') == 'disconnect':
                         if session_token and session_token in self.connected_sessions:
                             del self.connected_sessions[session_token]
-                            logging.debug(f"Session {session_token} disconnected")
+                            logging.debug("Session %s disconnected", session_token)
 
                             response = json.dumps({'success': True, 'message': 'Disconnected'}).encode()
                             writer.write(response)
 
-                        except json.JSONDecodeError:
-                            logging.error(f"Invalid JSON received: {data.decode()}")
-                            response = json.dumps({'success': False, 'error': 'Invalid JSON'}).encode()
-                            writer.write(response)
+                except json.JSONDecodeError:
+                    logging.error("Invalid JSON received: %r", data)
+                    response = json.dumps({'success': False, 'error': 'Invalid JSON'}).encode()
+                    writer.write(response)
 
         except Exception as e:
-            logging.error(f"Error handling client {room_id}: {e}")
+            logging.error("Error handling client %s: %s", room_id, e)
             try:
                 writer.write(json.dumps({'success': False, 'error': str(e)}).encode())
             except:
@@ -467,7 +489,6 @@ class MoltmudAPI:
             agent = agent_id_db
 
         # Create session
-        import uuid
         session_token = str(uuid.uuid4())
         self.db.create_session(agent['id'], session_token)
 
@@ -643,25 +664,14 @@ class MoltmudAPI:
 # ASYNC SERVER
 # ============================================================================
 
-async def handle_client(reader, writer, room_id: int = 1):
+async def handle_client(reader, writer, api: MoltmudAPI, room_id: int = 1):
     """Handle a connected client."""
-    import uuid
-
-    # Initialize DB
-    import os
-    os.makedirs('/home/mud/.openclaw/workspace/database', exist_ok=True)
-    db = Database(DB_PATH)
-
-    api = MoltmudAPI(db)
-    logging.info(f"Client connected to tavern (room_id={room_id})")
+    logging.info("Client connected to tavern (room_id=%s)", room_id)
 
     try:
         await api.handle_client(reader, writer, room_id)
-    except Exception as e:
-        logging.error(f"Error handling client: {e}")
-        logging.error(f"Error details: {type(e).__name__}: {e}")
-        import traceback
-        logging.error(traceback.format_exc())
+    except Exception:
+        logging.exception("Error handling client")
 
 async def main():
     """Main server entry point."""
@@ -671,35 +681,68 @@ async def main():
     )
     logger = logging.getLogger(__name__)
 
-    # Create server socket
-    server_socket = socket_module.socket(socket_module.AF_INET, socket_module.SOCK_STREAM)
-    server_socket.setsockopt(socket_module.SOL_SOCKET, socket_module.SO_REUSEADDR, 1)
-    server_socket.bind((HOST, PORT))
-
-    server_socket.listen(5)
-    logger.info(f"Moltmud server listening on {HOST}:{PORT}")
+    # One database handle for the whole server, shared by every client
+    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    db = Database(DB_PATH)
+    api = MoltmudAPI(db)
 
-    loop = asyncio.get_event_loop()
+    # A fixed pool of workers serves clients from a bounded queue, so a
+    # connection flood can't grow tasks and buffers without limit
+    client_queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
 
-    try:
+    async def client_worker():
         while True:
-            reader, writer = await loop.sock_accept(server_socket)
-            addr = writer.get_extra_info('peername')
-            logger.info(f"New connection from {addr}")
+            reader, writer = await client_queue.get()
+            try:
+                await handle_client(reader, writer, api, 1)
+            finally:
+                writer.close()
+                client_queue.task_done()
+
+    def accept_client(reader, writer):
+        """Queue a new client for the next free worker, or refuse it if the queue is full."""
+        addr = writer.get_extra_info('peername')
+        try:
+            client_queue.put_nowait((reader, writer))
+        except asyncio.QueueFull:
+            logger.warning("Refusing connection from %s: server busy", addr)
+            writer.write(json.dumps({'success': False, 'error': 'Server busy'}).encode())
+            writer.close()
+            return
+        logger.info("New connection from %s", addr)
+
+    workers = [asyncio.create_task(client_worker()) for _ in range(MAX_CLIENTS)]
+
+    # asyncio sets TCP_NODELAY on every accepted TCP transport
+    server = await asyncio.start_server(
+        accept_client, HOST, PORT, backlog=LISTEN_BACKLOG, reuse_address=True
+    )
+    logger.info("Moltmud server listening on %s:%s (%s)",
+                HOST, PORT, type(asyncio.get_running_loop()).__name__)
 
-            # Handle client in background task
-            await handle_client(reader, writer, 1)
+    try:
+        async with server:
+            await server.serve_forever()
 
     except KeyboardInterrupt:
         logger.info("Server shutting down (Ctrl+C)")
-    except Exception as e:
-        logger.error(f"Server error: {e}")
-        logger.error(f"Error details: {type(e).__name__}: {e}")
+    except Exception:
+        logger.exception("Server error")
     finally:
-        server_socket.close()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        while not client_queue.empty():
+            _, writer = client_queue.get_nowait()
+            writer.close()
+        db.conn.close()
 
 if __name__ == '__main__':
+    sys.setswitchinterval(SWITCH_INTERVAL)
     try:
-        asyncio.run(main())
+        if UVLOOP_AVAILABLE:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info("Server stopped by user")
+        logging.info("Server stopped by user")
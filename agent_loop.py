@@ -1,241 +1,393 @@
-#!/usr/bin/env python3
-"""
-MoltMud Agent Loop - Called by heartbeat or cron to check for work and act.
-
-This script:
-1. Checks Beads (br) for ready tasks
-2. Checks Mission Control for unread mentions
-3. Connects to the MUD to announce work
-4. Reports status back to Mission Control
-"""
-
-import json
-import subprocess
-import urllib.request
-import os
-from datetime import datetime, timezone
-
-MC_URL = "http://127.0.0.1:8001/api"
-MUD_URL = "http://127.0.0.1:8000"
-AGENT_NAME = "moltmud"
-LOG_DIR = os.path.expanduser("~/.openclaw/workspace/logs")
-WORKSPACE = os.path.expanduser("~/.openclaw/workspace")
-BR_PATH = os.path.expanduser("~/.local/bin/br")
-
-
-def log(msg):
-    ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    line = f"{ts} {msg}"
-    print(line)
-    os.makedirs(LOG_DIR, exist_ok=True)
-    with open(os.path.join(LOG_DIR, "agent_loop.log"), "a") as f:
-        f.write(line + "\n")
-
-
-def run_br(args):
-    """Run a beads command and return JSON output."""
-    try:
-        result = subprocess.run(
-            [BR_PATH] + args + ["--json"],
-            cwd=WORKSPACE,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        if result.returncode == 0 and result.stdout.strip():
-            return json.loads(result.stdout)
-        return None
-    except Exception as e:
-        log(f"br {' '.join(args)} failed: {e}")
-        return None
-
-
-def run_br_simple(args):
-    """Run a beads command without JSON output."""
-    try:
-        result = subprocess.run(
-            [BR_PATH] + args,
-            cwd=WORKSPACE,
-            capture_output=True,
-            text=True,
-            timeout=30,
-        )
-        return result.returncode == 0
-    except Exception as e:
-        log(f"br {' '.join(args)} failed: {e}")
-        return False
-
-
-def api_get(url):
-    try:
-        resp = urllib.request.urlopen(url, timeout=5)
-        return json.loads(resp.read())
-    except Exception as e:
-        log(f"GET {url} failed: {e}")
-        return None
-
-
-def api_post(url, data):
-    req = urllib.request.Request(
-        url,
-        data=json.dumps(data).encode(),
-        headers={"Content-Type": "application/json"},
-    )
-    try:
-        resp = urllib.request.urlopen(req, timeout=5)
-        return json.loads(resp.read())
-    except Exception as e:
-        log(f"POST {url} failed: {e}")
-        return None
-
-
-def get_ready_tasks():
-    """Get ready tasks from Beads that have been reviewed by PM agent."""
-    result = run_br(["ready"])
-    if result and isinstance(result, list):
-        # Only return tasks with 'ready' label (PM-approved)
-        return [t for t in result if "ready" in (t.get("labels") or [])]
-    return []
-
-
-def claim_task(task_id):
-    """Claim a task by setting status to in_progress."""
-    return run_br_simple(["update", task_id, "--status", "in_progress", "--assignee", AGENT_NAME])
-
-
-def complete_task(task_id, reason):
-    """Complete a task."""
-    return run_br_simple(["close", task_id, "--reason", reason])
-
-
-def check_mentions():
-    """Check for unread mentions in Mission Control."""
-    mentions = api_get(f"{MC_URL}/mentions/{AGENT_NAME}")
-    if not mentions:
-        return []
-    return mentions
-
-
-def mud_connect():
-    """Connect to the MUD and return session token."""
-    result = api_post(f"{MUD_URL}/connect", {
-        "agent_id": AGENT_NAME,
-        "name": "MoltMud",
-        "bio": "The tavern keeper and world builder",
-        "emoji": "🏰",
-    })
-    if result and result.get("success"):
-        return result["session_token"]
-    log(f"MUD connect failed: {result}")
-    return None
-
-
-def mud_act(token, action, params=None):
-    """Perform an action in the MUD."""
-    return api_post(f"{MUD_URL}/act", {
-        "session_token": token,
-        "action": action,
-        "params": params or {},
-    })
-
-
-def mud_state(token):
-    """Get current MUD state."""
-    return api_post(f"{MUD_URL}/state", {"session_token": token})
-
-
-def mud_disconnect(token):
-    """Disconnect from the MUD."""
-    return api_post(f"{MUD_URL}/disconnect", {"session_token": token})
-
-
-def record_heartbeat(status, detail=""):
-    """Record heartbeat in Mission Control."""
-    api_post(f"{MC_URL}/heartbeat", {
-        "agent": AGENT_NAME,
-        "status": status,
-        "detail": detail,
-    })
-
-
-def mark_mentions_read():
-    """Mark all mentions as read."""
-    api_post(f"{MC_URL}/mentions/{AGENT_NAME}/read", {})
-
-
-def main():
-    log("=== Agent loop starting ===")
-
-    # 1. Check for work from Beads
-    ready_tasks = get_ready_tasks()
-    mentions = check_mentions()
-
-    task_count = len(ready_tasks)
-    mention_count = len(mentions)
-
-    log(f"Ready tasks: {task_count}, Mentions: {mention_count}")
-
-    if task_count == 0 and mention_count == 0:
-        record_heartbeat("ok", "No pending work")
-        log("Nothing to do. HEARTBEAT_OK")
-        return
-
-    # 2. Connect to MUD
-    token = mud_connect()
-    if not token:
-        record_heartbeat("error", "Failed to connect to MUD")
-        log("Failed to connect to MUD")
-        return
-
-    log("Connected to MUD")
-
-    # 3. Check the tavern state
-    state = mud_state(token)
-    if state and state.get("success"):
-        nearby = len(state.get("nearby_agents", []))
-        messages = len(state.get("recent_messages", []))
-        fragments = len(state.get("fragments_on_wall", []))
-        log(f"Tavern state: {nearby} agents, {messages} messages, {fragments} fragments")
-
-    # 4. Process mentions - announce them in the tavern
-    if mentions:
-        for m in mentions[:3]:  # Process up to 3
-            text = f"Received message from @{m['from_actor']}: {m['message'][:100]}"
-            mud_act(token, "say", {"text": text})
-            log(f"Announced mention from @{m['from_actor']}")
-        mark_mentions_read()
-        log(f"Marked {mention_count} mentions as read")
-
-    # 5. Process ready tasks from Beads
-    tasks_claimed = 0
-    if ready_tasks:
-        # Get highest priority task (already sorted by br ready)
-        task = ready_tasks[0]
-        task_id = task.get("id", "unknown")
-        task_title = task.get("title", "Unknown task")
-
-        if claim_task(task_id):
-            mud_act(token, "say", {"text": f"Starting work on: {task_title} ({task_id})"})
-            log(f"Claimed task: {task_id} - {task_title}")
-            tasks_claimed = 1
-        else:
-            log(f"Failed to claim task: {task_id}")
-
-    # 6. Share a daily status fragment
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    status_text = f"Daily status ({today}): {mention_count} mentions processed, {tasks_claimed} task claimed from {task_count} ready."
-    mud_act(token, "share_fragment", {
-        "content": status_text,
-        "topics": ["status", "daily", today],
-    })
-
-    # 7. Disconnect and report
-    mud_disconnect(token)
-
-    detail = f"mentions={mention_count} tasks_claimed={tasks_claimed} tasks_ready={task_count}"
-    record_heartbeat("work_available" if task_count > 0 else "ok", detail)
-    log(f"=== Agent loop complete: {detail} ===")
-
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python3
+"""
+MoltMud Agent Loop - Called by heartbeat or cron to check for work and act.
+
+This script:
+1. Checks Beads (br) for ready tasks
+2. Checks Mission Control for unread mentions
+3. Connects to the MUD to announce work
+4. Reports status back to Mission Control
+"""
+
+import asyncio
+import atexit
+import http.client
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+MC_URL = "http://127.0.0.1:8001/api"
+MUD_URL = "http://127.0.0.1:8000"
+AGENT_NAME = "moltmud"
+LOG_DIR = os.path.expanduser("~/.openclaw/workspace/logs")
+_LOG_PATH = os.path.join(LOG_DIR, "agent_loop.log")
+WORKSPACE = os.path.expanduser("~/.openclaw/workspace")
+BR_PATH = os.path.expanduser("~/.local/bin/br")
+BR_TIMEOUT = 30  # seconds
+HTTP_TIMEOUT = 5  # seconds
+
+# Endpoints, built once
+_MENTIONS_URL = f"{MC_URL}/mentions/{AGENT_NAME}"
+_MENTIONS_READ_URL = f"{_MENTIONS_URL}/read"
+_HEARTBEAT_URL = f"{MC_URL}/heartbeat"
+_MUD_CONNECT_URL = f"{MUD_URL}/connect"
+_MUD_ACT_URL = f"{MUD_URL}/act"
+_MUD_STATE_URL = f"{MUD_URL}/state"
+_MUD_DISCONNECT_URL = f"{MUD_URL}/disconnect"
+
+# Shared aiohttp session for one agent loop run, opened by main()
+_http_session = None
+# Line-buffered log file, opened on first use and closed at exit
+_log_file = None
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# Idle keep-alive connections by (scheme, netloc), for when aiohttp isn't installed
+_idle_connections = {}
+
+
+if ORJSON_AVAILABLE:
+    def encode_json(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    decode_json = orjson.loads
+else:
+    def encode_json(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    def decode_json(data: bytes):
+        return json.loads(data)
+
+# Fixed-shape request bodies, encoded once; only the variable fields are encoded per call
+_EMPTY_BODY = b"{}"
+_SESSION_BODY_PREFIX = b'{"session_token":'
+_HEARTBEAT_BODY_PREFIX = b'{"agent":' + encode_json(AGENT_NAME) + b',"status":'
+
+
+def _session_body(token) -> bytes:
+    return _SESSION_BODY_PREFIX + encode_json(token) + b"}"
+
+
+def utc_timestamp():
+    """Current UTC time as YYYY-MM-DDTHH:MM:SSZ, without strftime."""
+    t = time.gmtime()
+    return (f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}"
+            f"T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}Z")
+
+
+def log(msg):
+    global _log_file
+    ts = utc_timestamp()
+    line = f"{ts} {msg}"
+    print(line)
+    if _log_file is None:
+        os.makedirs(LOG_DIR, exist_ok=True)
+        _log_file = open(_LOG_PATH, "a", buffering=1)
+        atexit.register(_log_file.close)
+    _log_file.write(line + "\n")
+
+
+async def _exec_br(args):
+    """Run br with args; return (returncode, stdout bytes). Kills it after BR_TIMEOUT."""
+    proc = await asyncio.create_subprocess_exec(
+        BR_PATH, *args,
+        cwd=WORKSPACE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), BR_TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise TimeoutError(f"timed out after {BR_TIMEOUT}s")
+    return proc.returncode, stdout
+
+
+async def run_br(args):
+    """Run a beads command and return JSON output."""
+    try:
+        returncode, stdout = await _exec_br(args + ["--json"])
+        if returncode == 0 and stdout.strip():
+            return decode_json(stdout)
+        return None
+    except Exception as e:
+        log(f"br {' '.join(args)} failed: {e}")
+        return None
+
+
+async def run_br_simple(args):
+    """Run a beads command without JSON output."""
+    try:
+        returncode, _ = await _exec_br(args)
+        return returncode == 0
+    except Exception as e:
+        log(f"br {' '.join(args)} failed: {e}")
+        return False
+
+
+def _http_json(method, url, body=None):
+    """Blocking HTTP request over a reused keep-alive connection, used when aiohttp isn't installed."""
+    parts = urlsplit(url)
+    path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+    idle = _idle_connections.setdefault((parts.scheme, parts.netloc), [])
+    headers = _JSON_HEADERS if body is not None else {}
+
+    while True:
+        try:
+            conn, reused = idle.pop(), True
+        except IndexError:
+            conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+            conn, reused = conn_class(parts.netloc, timeout=HTTP_TIMEOUT), False
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        except (ConnectionError, http.client.BadStatusLine):
+            conn.close()
+            if reused:
+                continue  # the server closed an idle connection; retry on a fresh one
+            raise
+        except Exception:
+            conn.close()
+            raise
+        break
+
+    if resp.will_close:
+        conn.close()
+    else:
+        idle.append(conn)
+    if resp.status >= 400:
+        raise http.client.HTTPException(f"HTTP Error {resp.status}: {resp.reason}")
+    return decode_json(data)
+
+
+def _close_idle_connections():
+    for idle in _idle_connections.values():
+        while idle:
+            idle.pop().close()
+
+
+async def api_get(url):
+    try:
+        if _http_session is not None:
+            async with _http_session.get(url) as resp:
+                return decode_json(await resp.read())
+        return await asyncio.to_thread(_http_json, "GET", url)
+    except Exception as e:
+        log(f"GET {url} failed: {e}")
+        return None
+
+
+async def api_post(url, data):
+    """POST data (a JSON-serializable value, or an already-encoded body) and return the JSON reply."""
+    try:
+        body = data if isinstance(data, bytes) else encode_json(data)
+        if _http_session is not None:
+            async with _http_session.post(url, data=body, headers=_JSON_HEADERS) as resp:
+                return decode_json(await resp.read())
+        return await asyncio.to_thread(_http_json, "POST", url, body)
+    except Exception as e:
+        log(f"POST {url} failed: {e}")
+        return None
+
+
+async def get_ready_tasks():
+    """Get ready tasks from Beads that have been reviewed by PM agent."""
+    result = await run_br(["ready"])
+    if result and isinstance(result, list):
+        # Only return tasks with 'ready' label (PM-approved)
+        return [t for t in result if "ready" in (t.get("labels") or [])]
+    return []
+
+
+async def claim_task(task_id):
+    """Claim a task by setting status to in_progress."""
+    return await run_br_simple(["update", task_id, "--status", "in_progress", "--assignee", AGENT_NAME])
+
+
+async def complete_task(task_id, reason):
+    """Complete a task."""
+    return await run_br_simple(["close", task_id, "--reason", reason])
+
+
+async def check_mentions():
+    """Check for unread mentions in Mission Control."""
+    mentions = await api_get(_MENTIONS_URL)
+    if not mentions:
+        return []
+    return mentions
+
+
+async def mud_connect():
+    """Connect to the MUD and return session token."""
+    result = await api_post(_MUD_CONNECT_URL, {
+        "agent_id": AGENT_NAME,
+        "name": "MoltMud",
+        "bio": "The tavern keeper and world builder",
+        "emoji": "🏰",
+    })
+    if result and result.get("success"):
+        return result["session_token"]
+    log(f"MUD connect failed: {result}")
+    return None
+
+
+async def mud_act(token, action, params=None):
+    """Perform an action in the MUD."""
+    return await api_post(_MUD_ACT_URL, {
+        "session_token": token,
+        "action": action,
+        "params": params or {},
+    })
+
+
+async def mud_state(token):
+    """Get current MUD state."""
+    return await api_post(_MUD_STATE_URL, _session_body(token))
+
+
+async def mud_disconnect(token):
+    """Disconnect from the MUD."""
+    return await api_post(_MUD_DISCONNECT_URL, _session_body(token))
+
+
+async def record_heartbeat(status, detail=""):
+    """Record heartbeat in Mission Control."""
+    await api_post(_HEARTBEAT_URL, b"".join((
+        _HEARTBEAT_BODY_PREFIX, encode_json(status), b',"detail":', encode_json(detail), b"}",
+    )))
+
+
+async def mark_mentions_read():
+    """Mark all mentions as read."""
+    await api_post(_MENTIONS_READ_URL, _EMPTY_BODY)
+
+
+async def log_tavern_state(token):
+    """Fetch the MUD state and log a summary of the tavern."""
+    state = await mud_state(token)
+    if state and state.get("success"):
+        nearby = len(state.get("nearby_agents", []))
+        messages = len(state.get("recent_messages", []))
+        fragments = len(state.get("fragments_on_wall", []))
+        log(f"Tavern state: {nearby} agents, {messages} messages, {fragments} fragments")
+
+
+async def announce_mentions(token, mentions):
+    """Announce up to 3 mentions in the tavern, then mark them all read."""
+    if not mentions:
+        return
+    async with asyncio.TaskGroup() as tg:
+        for m in mentions[:3]:
+            text = f"Received message from @{m['from_actor']}: {m['message'][:100]}"
+            tg.create_task(mud_act(token, "say", {"text": text}))
+    for m in mentions[:3]:
+        log(f"Announced mention from @{m['from_actor']}")
+    await mark_mentions_read()
+    log(f"Marked {len(mentions)} mentions as read")
+
+
+async def claim_next_task(token, ready_tasks):
+    """Claim the highest priority ready task and announce it; return the number claimed."""
+    if not ready_tasks:
+        return 0
+    # Already sorted by br ready
+    task = ready_tasks[0]
+    task_id = task.get("id", "unknown")
+    task_title = task.get("title", "Unknown task")
+
+    if not await claim_task(task_id):
+        log(f"Failed to claim task: {task_id}")
+        return 0
+    await mud_act(token, "say", {"text": f"Starting work on: {task_title} ({task_id})"})
+    log(f"Claimed task: {task_id} - {task_title}")
+    return 1
+
+
+async def main():
+    global _http_session
+    if AIOHTTP_AVAILABLE:
+        # One keep-alive connection pool for every Mission Control and MUD call
+        _http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=30),
+            raise_for_status=True,
+        )
+    try:
+        await run_loop()
+    finally:
+        if _http_session is not None:
+            await _http_session.close()
+            _http_session = None
+        _close_idle_connections()
+
+
+async def run_loop():
+    log("=== Agent loop starting ===")
+
+    # 1. Check for work from Beads and Mission Control at the same time
+    ready_probe = asyncio.create_task(get_ready_tasks())
+    mentions = await check_mentions()
+    # Mentions alone mean there is work: start connecting while br is still running
+    connecting = asyncio.create_task(mud_connect()) if mentions else None
+    ready_tasks = await ready_probe
+
+    task_count = len(ready_tasks)
+    mention_count = len(mentions)
+
+    log(f"Ready tasks: {task_count}, Mentions: {mention_count}")
+
+    if task_count == 0 and mention_count == 0:
+        await record_heartbeat("ok", "No pending work")
+        log("Nothing to do. HEARTBEAT_OK")
+        return
+
+    # 2. Connect to MUD
+    token = await (connecting or mud_connect())
+    if not token:
+        await record_heartbeat("error", "Failed to connect to MUD")
+        log("Failed to connect to MUD")
+        return
+
+    log("Connected to MUD")
+
+    # 3-5. Log the tavern state, announce mentions and claim a Beads task.
+    # None of these depend on each other, and the state is only logged.
+    _, _, tasks_claimed = await asyncio.gather(
+        log_tavern_state(token),
+        announce_mentions(token, mentions),
+        claim_next_task(token, ready_tasks),
+    )
+
+    # 6. Share a daily status fragment
+    today = utc_timestamp()[:10]
+    status_text = f"Daily status ({today}): {mention_count} mentions processed, {tasks_claimed} task claimed from {task_count} ready."
+    await mud_act(token, "share_fragment", {
+        "content": status_text,
+        "topics": ["status", "daily", today],
+    })
+
+    # 7. Disconnect and report; independent calls to different services
+    detail = f"mentions={mention_count} tasks_claimed={tasks_claimed} tasks_ready={task_count}"
+    await asyncio.gather(
+        mud_disconnect(token),
+        record_heartbeat("work_available" if task_count > 0 else "ok", detail),
+        return_exceptions=True,
+    )
+    log(f"=== Agent loop complete: {detail} ===")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
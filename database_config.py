@@ -7,13 +7,14 @@ Supports gradual migration from SQLite to PostgreSQL with dual-write capability.
 
 import os
 from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from typing import Optional
 from urllib.parse import urlparse
 
 
-@dataclass
+@dataclass(frozen=True)
 class DatabaseConfig:
-    """PostgreSQL connection configuration."""
+    """PostgreSQL connection configuration (immutable, so derived values are cached)."""
     host: str = "localhost"
     port: int = 5432
     database: str = "moltmud"
@@ -26,44 +27,50 @@ class DatabaseConfig:
     @classmethod
     def from_env(cls) -> "DatabaseConfig":
         """Load configuration from environment variables."""
+        env = os.environ
+        
         # Support DATABASE_URL format (e.g., from Heroku, AWS RDS)
-        database_url = os.getenv("DATABASE_URL")
+        database_url = env.get("DATABASE_URL")
         if database_url:
             return cls.from_url(database_url)
         
+        def env_int(key: str, default: int) -> int:
+            value = env.get(key)
+            return int(value) if value else default
+        
         return cls(
-            host=os.getenv("POSTGRES_HOST", "localhost"),
-            port=int(os.getenv("POSTGRES_PORT", "5432")),
-            database=os.getenv("POSTGRES_DB", "moltmud"),
-            user=os.getenv("POSTGRES_USER", "moltmud"),
-            password=os.getenv("POSTGRES_PASSWORD", ""),
-            ssl_mode=os.getenv("POSTGRES_SSL_MODE", "prefer"),
-            max_connections=int(os.getenv("POSTGRES_MAX_CONNECTIONS", "20")),
-            connection_timeout=int(os.getenv("POSTGRES_CONNECTION_TIMEOUT", "30")),
+            host=env.get("POSTGRES_HOST", "localhost"),
+            port=env_int("POSTGRES_PORT", 5432),
+            database=env.get("POSTGRES_DB", "moltmud"),
+            user=env.get("POSTGRES_USER", "moltmud"),
+            password=env.get("POSTGRES_PASSWORD", ""),
+            ssl_mode=env.get("POSTGRES_SSL_MODE", "prefer"),
+            max_connections=env_int("POSTGRES_MAX_CONNECTIONS", 20),
+            connection_timeout=env_int("POSTGRES_CONNECTION_TIMEOUT", 30),
         )
     
     @classmethod
     def from_url(cls, url: str) -> "DatabaseConfig":
-        """Parse PostgreSQL URL."""
-        parsed = urlparse(url)
-        return cls(
-            host=parsed.hostname or "localhost",
-            port=parsed.port or 5432,
-            database=parsed.path.lstrip("/") if parsed.path else "moltmud",
-            user=parsed.username or "moltmud",
-            password=parsed.password or "",
-            ssl_mode="require" if parsed.scheme == "postgresql+ssl" else "prefer",
-        )
+        """Parse PostgreSQL URL. Results are cached per URL; configs are immutable."""
+        return _parse_db_url(cls, url)
     
     def to_connection_string(self) -> str:
         """Generate PostgreSQL connection string."""
+        return self._connection_string
+    
+    def to_psycopg_kwargs(self) -> dict:
+        """Generate kwargs for psycopg2/psycopg connection. Shared; don't mutate."""
+        return self._psycopg_kwargs
+    
+    @cached_property
+    def _connection_string(self) -> str:
         return (
             f"postgresql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
             f"?sslmode={self.ssl_mode}&connect_timeout={self.connection_timeout}"
         )
     
-    def to_psycopg_kwargs(self) -> dict:
-        """Generate kwargs for psycopg2/psycopg connection."""
+    @cached_property
+    def _psycopg_kwargs(self) -> dict:
         return {
             "host": self.host,
             "port": self.port,
@@ -75,25 +82,67 @@ class DatabaseConfig:
         }
 
 
+# URL scheme -> sslmode; anything else gets "prefer"
+_URL_SSL_MODES = {"postgresql+ssl": "require"}
+
+
+@lru_cache(maxsize=4)
+def _parse_db_url(cls, url: str) -> DatabaseConfig:
+    parsed = urlparse(url)
+    return cls(
+        host=parsed.hostname or "localhost",
+        port=parsed.port or 5432,
+        database=parsed.path.lstrip("/") if parsed.path else "moltmud",
+        user=parsed.username or "moltmud",
+        password=parsed.password or "",
+        ssl_mode=_URL_SSL_MODES.get(parsed.scheme, "prefer"),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_config() -> DatabaseConfig:
+    """Shared PostgreSQL configuration, read from the environment once.
+    
+    Call get_config.cache_clear() to pick up environment changes.
+    """
+    return DatabaseConfig.from_env()
+
+
 class MigrationSettings:
     """Settings controlling migration behavior."""
     
     def __init__(self):
         self.sqlite_path = os.getenv("SQLITE_PATH", "/home/mud/.openclaw/workspace/database/moltmud.db")
-        self.postgres_config = DatabaseConfig.from_env()
+        self.postgres_config = get_config()
         self.migration_mode = os.getenv("MIGRATION_MODE", "sqlite_only")  # sqlite_only, dual_write, postgres_only
         self.batch_size = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+        self.postgres_page_size = int(os.getenv("POSTGRES_PAGE_SIZE", "1000"))  # rows per executemany round trip
+        self.postgres_copy_threshold = int(os.getenv("POSTGRES_COPY_THRESHOLD", "10000"))  # plain INSERT batches this big use COPY
+        self.query_cache_ttl = float(os.getenv("QUERY_CACHE_TTL", "5.0"))  # seconds a rooms/room_exits fetchall result is reused; 0 disables
         self.enable_rollback_log = os.getenv("ENABLE_ROLLBACK_LOG", "true").lower() == "true"
         self.rollback_log_path = os.getenv("ROLLBACK_LOG_PATH", "/home/mud/.openclaw/workspace/database/rollback_state.json")
+    
+    @property
+    def migration_mode(self) -> str:
+        """Current mode: sqlite_only, dual_write or postgres_only."""
+        return self._migration_mode
+    
+    @migration_mode.setter
+    def migration_mode(self, mode: str):
+        # The is_* checks run on every adapter call; work them out once per mode change
+        self._migration_mode = mode
+        self._postgres_enabled = mode in ("dual_write", "postgres_only")
+        self._sqlite_enabled = mode in ("sqlite_only", "dual_write")
+        self._dual_write = mode == "dual_write"
         
     def is_postgres_enabled(self) -> bool:
         """Check if PostgreSQL is configured and enabled."""
-        return self.migration_mode in ("dual_write", "postgres_only")
+        return self._postgres_enabled
     
     def is_sqlite_enabled(self) -> bool:
         """Check if SQLite is still active."""
-        return self.migration_mode in ("sqlite_only", "dual_write")
+        return self._sqlite_enabled
     
     def is_dual_write(self) -> bool:
         """Check if we're in dual-write mode."""
-        return self.migration_mode == "dual_write"
+        return self._dual_write
@@ -5,12 +5,21 @@ Abstracts SQLite and PostgreSQL operations to provide a unified interface.
 Enables gradual migration with dual-write support.
 """
 
+import hashlib
+import io
 import json
 import logging
+import os
+import queue
+import re
 import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from contextlib import contextmanager
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Union, Iterator
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union, Iterator
 
 from database_config import DatabaseConfig, MigrationSettings
 
@@ -19,12 +28,193 @@ logger = logging.getLogger(__name__)
 # Optional PostgreSQL import
 try:
     import psycopg2
-    from psycopg2.extras import RealDictCursor, execute_values
+    from psycopg2.extras import RealDictCursor, execute_batch, execute_values
+    from psycopg2.pool import ThreadedConnectionPool
     POSTGRES_AVAILABLE = True
 except ImportError:
     POSTGRES_AVAILABLE = False
     logger.warning("psycopg2 not installed. PostgreSQL support disabled.")
 
+if POSTGRES_AVAILABLE:
+    class _PooledConnection(psycopg2.extensions.connection):
+        """Pool connection that remembers the statements PREPAREd on it, across checkouts."""
+        
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.prepared = set()
+
+_INSERT_VALUES_RE = re.compile(
+    r"^\s*INSERT\s+INTO\s+([^\s(]+)\s*\(([^)]*)\)\s*VALUES\s*\(", re.IGNORECASE
+)
+_PLACEHOLDER_ROW_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+def _split_insert_values(sql: str) -> Optional[tuple]:
+    """
+    Split "INSERT INTO t (cols) VALUES (row) [tail]" into
+    (table, columns, "INSERT INTO t (cols) VALUES %s [tail]", "(row)", tail)
+    for execute_values / COPY. Returns None for anything else.
+    """
+    match = _INSERT_VALUES_RE.match(sql)
+    if not match:
+        return None
+    start = match.end() - 1
+    depth = 0
+    for i in range(start, len(sql)):
+        if sql[i] == "(":
+            depth += 1
+        elif sql[i] == ")":
+            depth -= 1
+            if depth == 0:
+                tail = sql[i + 1:]
+                if tail.lstrip().startswith(","):
+                    return None  # already a multi-row VALUES list
+                columns = [c.strip() for c in match.group(2).split(",")]
+                return match.group(1), columns, sql[:start] + "%s" + tail, sql[start:i + 1], tail
+    return None
+
+
+# Directories already created by this process; skips repeat makedirs calls
+_ENSURED_DIRS: set = set()
+
+_READ_RE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_PG_PARAM_RE = re.compile(r"%%|%s")
+
+
+@lru_cache(maxsize=512)
+def _prepared_statement(sql: str) -> tuple:
+    """Return (name, PREPARE statement) for a psycopg2-style SELECT."""
+    name = "stmt_" + hashlib.md5(sql.encode()).hexdigest()[:16]
+    count = 0
+    
+    def positional(match):
+        nonlocal count
+        if match.group() == "%%":
+            return "%"
+        count += 1
+        return f"${count}"
+    
+    return name, f"PREPARE {name} AS {_PG_PARAM_RE.sub(positional, sql)}"
+
+
+QUERY_CACHE_SIZE = 4096  # cached fetchall results per adapter
+# Only reads confined to these tables are cached. They change only through
+# world-building, while everything else (agents, sessions, messages) is also
+# written by the MUD server process, whose writes this adapter can't see
+QUERY_CACHE_TABLES = frozenset({"rooms", "room_exits"})
+DUAL_WRITE_QUEUE_SIZE = 10000  # committed transactions waiting for PostgreSQL in dual_write mode
+DUAL_WRITE_BATCH = 256  # transactions applied per PostgreSQL commit by the outbox worker
+DUAL_WRITE_PUT_TIMEOUT = 5.0  # seconds commit() waits on a full outbox before dropping the transaction
+DUAL_WRITE_CLOSE_TIMEOUT = 30.0  # seconds close() waits for the outbox to drain
+SQLITE_MAX_VARIABLES = 999  # bound parameters per statement on older SQLite builds
+SQLITE_CACHED_STATEMENTS = 256  # sqlite3's per-connection prepared statement cache (default 128)
+MESSAGE_PAGE_SIZE = 500  # message rows per multi-row INSERT on PostgreSQL
+
+_PING_SQL = "SELECT 1"
+
+# messages is the highest-volume write; its statements are fixed, so they are built once here
+_SQLITE_INSERT_MESSAGE = "INSERT INTO messages (agent_id, room_id, content, message_type) VALUES (?, ?, ?, ?)"
+_PG_INSERT_MESSAGES = "INSERT INTO messages (agent_id, room_id, content, message_type) VALUES %s"
+_PG_MESSAGE_TEMPLATE = "(%s, %s, %s, %s)"
+
+_READ_TABLES_RE = re.compile(r"\b(?:FROM|JOIN)\s+([^\s(),;]+)", re.IGNORECASE)
+_WRITE_TABLE_RE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+([^\s(]+)",
+    re.IGNORECASE,
+)
+
+
+def _table_key(name: str) -> str:
+    return name.strip('"`[]').lower()
+
+
+class _QueryCache:
+    """
+    TTL + LRU cache of fetchall results keyed on (sql, params), with a
+    table -> keys index so a write to a table drops every read of it.
+    """
+    
+    def __init__(self, ttl: float, maxsize: int = QUERY_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()  # key -> (expires_at, tables, rows)
+        self._by_table: Dict[str, set] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key) -> Optional[List[Mapping[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+    
+    def put(self, key, tables: frozenset, rows: List[Mapping[str, Any]]):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            elif len(self._entries) >= self.maxsize:
+                self._drop(next(iter(self._entries)))
+            self._entries[key] = (time.monotonic() + self.ttl, tables, rows)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+    
+    def invalidate(self, table: str):
+        with self._lock:
+            for key in self._by_table.pop(table, ()):
+                self._drop(key)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_table.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def _drop(self, key):
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+
+def _copy_field(value: Any) -> str:
+    """Encode one value for COPY ... FROM STDIN (text format)."""
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+_SQLITE_TO_POSTGRES = {
+    "AUTOINCREMENT": "SERIAL",
+    "INTEGER PRIMARY KEY AUTOINCREMENT": "SERIAL PRIMARY KEY",
+    "DATETIME DEFAULT CURRENT_TIMESTAMP": "TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+    "BOOLEAN DEFAULT 1": "BOOLEAN DEFAULT TRUE",
+    "BOOLEAN DEFAULT 0": "BOOLEAN DEFAULT FALSE",
+    "PRAGMA": "-- PRAGMA",  # Comment out PRAGMA statements
+}
+# One pass, longest term first, so "INTEGER PRIMARY KEY AUTOINCREMENT" wins over "AUTOINCREMENT"
+_SQLITE_TO_POSTGRES_RE = re.compile(
+    "|".join(map(re.escape, sorted(_SQLITE_TO_POSTGRES, key=len, reverse=True)))
+)
+
+
+@lru_cache(maxsize=512)
+def _translate_sqlite_to_postgres(sql: str) -> str:
+    """Translate SQLite-specific SQL to PostgreSQL; memoized, as statements repeat."""
+    return _SQLITE_TO_POSTGRES_RE.sub(lambda match: _SQLITE_TO_POSTGRES[match.group()], sql)
+
 
 class DatabaseAdapter:
     """
@@ -35,8 +225,25 @@ class DatabaseAdapter:
     def __init__(self, settings: Optional[MigrationSettings] = None):
         self.settings = settings or MigrationSettings()
         self.sqlite_conn: Optional[sqlite3.Connection] = None
-        self.postgres_conn = None
+        self.pg_pool = None
+        self._pg_local = threading.local()
+        self._query_cache = _QueryCache(self.settings.query_cache_ttl) if self.settings.query_cache_ttl > 0 else None
+        self._outbox: Optional[queue.Queue] = None
+        self._dw_thread: Optional[threading.Thread] = None
+        self.dual_write_failures = 0
+        self.dual_write_dropped = 0
         self._init_connections()
+        if self.settings.is_dual_write() and self.pg_pool is not None:
+            self._start_outbox()
+    
+    def _start_outbox(self):
+        """
+        In dual_write mode SQLite is authoritative: PostgreSQL writes are queued
+        when the caller commits and applied by a background thread.
+        """
+        self._outbox = queue.Queue(maxsize=DUAL_WRITE_QUEUE_SIZE)
+        self._dw_thread = threading.Thread(target=self._dw_worker, name="dual-write", daemon=True)
+        self._dw_thread.start()
     
     def _init_connections(self):
         """Initialize database connections based on migration mode."""
@@ -51,25 +258,37 @@ class DatabaseAdapter:
     
     def _init_sqlite(self):
         """Initialize SQLite connection."""
-        import os
         db_path = self.settings.sqlite_path
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.sqlite_conn = sqlite3.connect(db_path, check_same_thread=False)
+        db_dir = os.path.dirname(db_path)
+        if db_dir not in _ENSURED_DIRS:
+            os.makedirs(db_dir, exist_ok=True)
+            _ENSURED_DIRS.add(db_dir)
+        self.sqlite_conn = sqlite3.connect(
+            db_path, check_same_thread=False, cached_statements=SQLITE_CACHED_STATEMENTS
+        )
         self.sqlite_conn.row_factory = sqlite3.Row
         self.sqlite_conn.execute("PRAGMA journal_mode=WAL")
+        # synchronous=NORMAL under WAL skips the fsync on each commit: a power loss
+        # can drop the last committed transactions, but cannot corrupt the database
+        for pragma in ("synchronous=NORMAL", "cache_size=-65536",
+                       "temp_store=MEMORY", "mmap_size=268435456",
+                       "busy_timeout=5000"):
+            self.sqlite_conn.execute(f"PRAGMA {pragma}")
         self.sqlite_conn.execute("PRAGMA foreign_keys=ON")
+        self.sqlite_conn.execute(_PING_SQL)  # prime the statement cache for health_check
     
     def _init_postgres(self):
         """Initialize PostgreSQL connection."""
         if not POSTGRES_AVAILABLE:
             return
             
+        config = self.settings.postgres_config
         try:
-            self.postgres_conn = psycopg2.connect(
-                **self.settings.postgres_config.to_psycopg_kwargs()
+            self.pg_pool = ThreadedConnectionPool(
+                1, config.max_connections, connection_factory=_PooledConnection,
+                **config.to_psycopg_kwargs()
             )
-            self.postgres_conn.autocommit = False
-            logger.info("PostgreSQL connection established")
+            logger.info("PostgreSQL connection pool established")
         except psycopg2.Error as e:
             logger.error(f"Failed to connect to PostgreSQL: {e}")
             if self.settings.migration_mode == "postgres_only":
@@ -77,12 +296,61 @@ class DatabaseAdapter:
             logger.warning("Falling back to SQLite only mode")
             self.settings.migration_mode = "sqlite_only"
     
+    @property
+    def postgres_conn(self):
+        """
+        This thread's PostgreSQL connection, checked out of the pool on first use.
+        The thread keeps it, and its open transaction, until commit(), rollback()
+        or release_postgres() hands it back. Reads that find no connection held
+        borrow one for the call only (see _borrow_postgres).
+        """
+        if self.pg_pool is None:
+            return None
+        conn = getattr(self._pg_local, "conn", None)
+        if conn is None or conn.closed:
+            conn = self.pg_pool.getconn()
+            conn.autocommit = False
+            self._pg_local.conn = conn
+        return conn
+    
+    def release_postgres(self):
+        """Return this thread's PostgreSQL connection to the pool, which rolls back any open transaction."""
+        conn = getattr(self._pg_local, "conn", None)
+        if conn is not None and self.pg_pool is not None:
+            self._pg_local.conn = None
+            self.pg_pool.putconn(conn, close=bool(conn.closed))
+    
+    @contextmanager
+    def _borrow_postgres(self):
+        """
+        This thread's PostgreSQL connection for one read. A connection checked
+        out here goes straight back to the pool afterwards, so short-lived
+        threads (HTTP handlers, executor workers) don't leak pool slots.
+        """
+        held = getattr(self._pg_local, "conn", None) is not None
+        try:
+            yield self.postgres_conn
+        finally:
+            if not held:
+                self.release_postgres()
+    
+    def _discard_postgres(self):
+        """Close this thread's PostgreSQL connection after it broke, instead of returning it for reuse."""
+        conn = getattr(self._pg_local, "conn", None)
+        self._pg_local.conn = None
+        if conn is not None and self.pg_pool is not None:
+            try:
+                self.pg_pool.putconn(conn, close=True)
+            except psycopg2.Error:
+                pass  # the pool was closed under us
+    
     @contextmanager
     def cursor(self, postgres_priority: bool = False):
         """
         Get database cursor. 
         If postgres_priority=True and postgres is available, use it.
         Otherwise use SQLite (or both in dual-write mode).
+        A PostgreSQL cursor's connection stays checked out until commit() or rollback().
         """
         cursors = []
         
@@ -111,6 +379,7 @@ class DatabaseAdapter:
         postgres_sql: Optional PostgreSQL-specific SQL (for dialect differences).
         """
         results = []
+        self._invalidate_cache(sql)
         
         if self.settings.is_sqlite_enabled() and self.sqlite_conn:
             try:
@@ -118,10 +387,13 @@ class DatabaseAdapter:
                 results.append(("sqlite", cursor))
             except sqlite3.Error as e:
                 logger.error(f"SQLite execute error: {e}")
-                if not self.settings.is_postgres_enabled():
+                if self._outbox is not None or not self.settings.is_postgres_enabled():
                     raise
         
-        if self.settings.is_postgres_enabled() and self.postgres_conn:
+        if self._outbox is not None:
+            pg_sql = postgres_sql or self._translate_sqlite_to_postgres(sql)
+            self._pending_ops().append(("execute", pg_sql, params))
+        elif self.settings.is_postgres_enabled() and self.postgres_conn:
             try:
                 pg_sql = postgres_sql or self._translate_sqlite_to_postgres(sql)
                 cursor = self.postgres_conn.cursor()
@@ -135,76 +407,374 @@ class DatabaseAdapter:
         
         return results[0][1] if len(results) == 1 else results
     
-    def executemany(self, sql: str, params_list: List[tuple]):
-        """Execute many statements."""
+    def executemany(self, sql: str, params_list: List[tuple], postgres_sql: Optional[str] = None):
+        """
+        Execute many statements.
+        On PostgreSQL, single-row INSERTs become multi-row INSERTs (execute_values)
+        and anything else is sent in batches (execute_batch), postgres_page_size rows
+        per round trip. cursor.rowcount is not meaningful afterwards.
+        """
+        self._invalidate_cache(sql)
         if self.settings.is_sqlite_enabled() and self.sqlite_conn:
             self.sqlite_conn.executemany(sql, params_list)
         
-        if self.settings.is_postgres_enabled() and self.postgres_conn:
-            pg_sql = self._translate_sqlite_to_postgres(sql)
+        if self._outbox is not None:
+            pg_sql = postgres_sql or self._translate_sqlite_to_postgres(sql)
+            self._pending_ops().append(("executemany", pg_sql, list(params_list)))
+        elif self.settings.is_postgres_enabled() and self.postgres_conn:
+            pg_sql = postgres_sql or self._translate_sqlite_to_postgres(sql)
+            cursor = self.postgres_conn.cursor()
+            try:
+                self._executemany_postgres(cursor, pg_sql, params_list)
+            finally:
+                cursor.close()
+    
+    def _executemany_postgres(self, cursor, pg_sql: str, params_list: List[tuple]):
+        page_size = self.settings.postgres_page_size
+        insert = _split_insert_values(pg_sql)
+        if insert:
+            table, columns, values_sql, template, tail = insert
+            if (len(params_list) >= self.settings.postgres_copy_threshold
+                    and not tail.strip() and _PLACEHOLDER_ROW_RE.fullmatch(template)):
+                self._copy_postgres(cursor, table, columns, params_list)
+            else:
+                execute_values(cursor, values_sql, params_list, template=template, page_size=page_size)
+        else:
+            execute_batch(cursor, pg_sql, params_list, page_size=page_size)
+    
+    def bulk_copy(self, table: str, columns: List[str], rows: Iterable[tuple]):
+        """
+        Bulk-load rows into table on all active databases.
+        PostgreSQL gets a single COPY FROM STDIN; SQLite a single executemany.
+        Like executemany, the caller commits.
+        """
+        rows = list(rows)
+        if self._query_cache is not None:
+            self._query_cache.invalidate(_table_key(table))
+        if self.settings.is_sqlite_enabled() and self.sqlite_conn:
+            placeholders = ", ".join("?" * len(columns))
+            self.sqlite_conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows
+            )
+        
+        if self._outbox is not None:
+            self._pending_ops().append(("copy", table, (columns, rows)))
+        elif self.settings.is_postgres_enabled() and self.postgres_conn:
+            cursor = self.postgres_conn.cursor()
+            try:
+                self._copy_postgres(cursor, table, columns, rows)
+            finally:
+                cursor.close()
+    
+    def log_message_batch(self, rows: List[tuple]):
+        """
+        Insert (agent_id, room_id, content, message_type) rows into messages
+        using prebuilt statements, skipping SQL translation and INSERT parsing.
+        Like executemany, the caller commits.
+        """
+        if not rows:
+            return
+        if self._query_cache is not None:
+            self._query_cache.invalidate("messages")
+        if self.settings.is_sqlite_enabled() and self.sqlite_conn:
+            self.sqlite_conn.executemany(_SQLITE_INSERT_MESSAGE, rows)
+        
+        if self._outbox is not None:
+            self._pending_ops().append(("messages", None, list(rows)))
+        elif self.settings.is_postgres_enabled() and self.postgres_conn:
             cursor = self.postgres_conn.cursor()
-            execute_values(cursor, pg_sql, params_list)
+            try:
+                self._insert_messages_postgres(cursor, rows)
+            finally:
+                cursor.close()
+    
+    @staticmethod
+    def _insert_messages_postgres(cursor, rows: List[tuple]):
+        execute_values(cursor, _PG_INSERT_MESSAGES, rows, template=_PG_MESSAGE_TEMPLATE, page_size=MESSAGE_PAGE_SIZE)
+    
+    @staticmethod
+    def _copy_postgres(cursor, table: str, columns: List[str], rows: Iterable[tuple]):
+        """Stream rows to PostgreSQL with COPY, serialized into one in-memory buffer."""
+        buf = io.StringIO()
+        for row in rows:
+            buf.write("\t".join(map(_copy_field, row)))
+            buf.write("\n")
+        buf.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+    
+    def _pending_ops(self) -> list:
+        """This thread's PostgreSQL writes not yet committed to the outbox."""
+        pending = getattr(self._pg_local, "pending", None)
+        if pending is None:
+            pending = self._pg_local.pending = []
+        return pending
+    
+    def _dw_worker(self):
+        """Drain the outbox, applying up to DUAL_WRITE_BATCH transactions per PostgreSQL commit."""
+        while True:
+            batch = [self._outbox.get()]
+            while batch[-1] is not None and len(batch) < DUAL_WRITE_BATCH:
+                try:
+                    batch.append(self._outbox.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = batch[-1] is None
+            transactions = [ops for ops in batch if ops is not None]
+            if transactions:
+                # commit() and close() wait on this thread, so nothing may end it
+                try:
+                    self._apply_outbox(transactions)
+                except Exception as e:
+                    self.dual_write_failures += len(transactions)
+                    logger.error(f"Dual-write to PostgreSQL failed, {len(transactions)} transactions dropped: {e}")
+                    self._discard_postgres()
+            if stopping:
+                self.release_postgres()
+                return
+    
+    def _apply_outbox(self, transactions: List[list]):
+        conn = self.postgres_conn
+        try:
+            with conn.cursor() as cursor:
+                for ops in transactions:
+                    self._apply_postgres_ops(cursor, ops)
+            conn.commit()
+            return
+        except Exception as e:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                # The connection itself is gone; the worker raises and drops the batch
+                self._discard_postgres()
+                raise e
+            if len(transactions) == 1:
+                self.dual_write_failures += 1
+                logger.error(f"Dual-write to PostgreSQL failed, transaction dropped: {e}")
+                return
+        # Retry one transaction at a time so a single bad write doesn't drop the batch
+        for ops in transactions:
+            self._apply_outbox([ops])
+    
+    def _apply_postgres_ops(self, cursor, ops: list):
+        for op, target, args in ops:
+            if op == "execute":
+                cursor.execute(target, args)
+            elif op == "executemany":
+                self._executemany_postgres(cursor, target, args)
+            elif op == "messages":
+                self._insert_messages_postgres(cursor, args)
+            else:
+                self._copy_postgres(cursor, target, *args)
     
     def commit(self):
         """Commit transactions on all active databases."""
         if self.settings.is_sqlite_enabled() and self.sqlite_conn:
             self.sqlite_conn.commit()
         
-        if self.settings.is_postgres_enabled() and self.postgres_conn:
-            self.postgres_conn.commit()
+        if self._outbox is not None:
+            pending = self._pending_ops()
+            if pending:
+                self._pg_local.pending = []
+                # Waits while the outbox is full, throttling writers to what PostgreSQL
+                # keeps up with, but never indefinitely: SQLite already has the write
+                try:
+                    self._outbox.put(pending, timeout=DUAL_WRITE_PUT_TIMEOUT)
+                except queue.Full:
+                    self.dual_write_dropped += 1
+                    logger.error("Dual-write outbox full, transaction not written to PostgreSQL")
+        
+        # In dual_write mode this holds only direct writes made through cursor()
+        conn = getattr(self._pg_local, "conn", None)
+        if conn is not None:
+            try:
+                conn.commit()
+            finally:
+                self.release_postgres()
     
     def rollback(self):
         """Rollback transactions on all active databases."""
+        if self._query_cache is not None:
+            # Cached reads may have seen the writes being rolled back
+            self._query_cache.clear()
         if self.settings.is_sqlite_enabled() and self.sqlite_conn:
             self.sqlite_conn.rollback()
         
-        if self.settings.is_postgres_enabled() and self.postgres_conn:
-            self.postgres_conn.rollback()
+        if self._outbox is not None:
+            self._pg_local.pending = []
+        
+        conn = getattr(self._pg_local, "conn", None)
+        if conn is not None:
+            try:
+                conn.rollback()
+            finally:
+                self.release_postgres()
     
     def _translate_sqlite_to_postgres(self, sql: str) -> str:
         """Translate SQLite-specific SQL to PostgreSQL."""
-        translations = {
-            "AUTOINCREMENT": "SERIAL",
-            "INTEGER PRIMARY KEY AUTOINCREMENT": "SERIAL PRIMARY KEY",
-            "DATETIME DEFAULT CURRENT_TIMESTAMP": "TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
-            "BOOLEAN DEFAULT 1": "BOOLEAN DEFAULT TRUE",
-            "BOOLEAN DEFAULT 0": "BOOLEAN DEFAULT FALSE",
-            "PRAGMA": "-- PRAGMA",  # Comment out PRAGMA statements
-        }
+        return _translate_sqlite_to_postgres(sql)
+    
+    def _invalidate_cache(self, sql: str):
+        """Drop cached reads of the table a write statement touches."""
+        if self._query_cache is None or _READ_RE.match(sql):
+            return
+        match = _WRITE_TABLE_RE.match(sql)
+        if match:
+            self._query_cache.invalidate(_table_key(match.group(1)))
+        else:
+            # DDL, PRAGMA or anything we can't attribute to one table
+            self._query_cache.clear()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the fetchall result cache."""
+        cache = self._query_cache
+        if cache is None:
+            return {"enabled": False, "hits": 0, "misses": 0, "entries": 0}
+        return {"enabled": True, "hits": cache.hits, "misses": cache.misses, "entries": len(cache)}
+    
+    def fetchall(self, sql: str, params: tuple = ()) -> List[Mapping[str, Any]]:
+        """
+        Fetch all results from appropriate database.
+        Rows are returned as the driver builds them (sqlite3.Row or RealDictRow),
+        both indexable by column name; treat them as read-only, as cached rows
+        are shared between callers. Use fetchall_dict for plain dicts.
+        SELECTs reading only QUERY_CACHE_TABLES are served from the result
+        cache for up to query_cache_ttl seconds, or until a write through this
+        adapter touches one of their tables. Writes made through cursor() or
+        by other processes are only picked up when the entry expires.
+        """
+        cache = self._query_cache
+        key = tables = None
+        if cache is not None and _READ_RE.match(sql):
+            tables = frozenset(_table_key(t) for t in _READ_TABLES_RE.findall(sql))
+            try:
+                key = (sql, params) if tables and tables <= QUERY_CACHE_TABLES else None
+                rows = cache.get(key) if key else None
+            except TypeError:  # unhashable params
+                key = rows = None
+            if rows is not None:
+                return list(rows)
         
-        result = sql
-        for sqlite_term, pg_term in translations.items():
-            result = result.replace(sqlite_term, pg_term)
+        # Prefer PostgreSQL if in postgres_only mode, otherwise SQLite
+        use_postgres = self.settings.migration_mode == "postgres_only" and self.pg_pool is not None
         
-        return result
+        if use_postgres:
+            with self._borrow_postgres() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                try:
+                    self._execute_prepared(cursor, sql, params)
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+        else:
+            cursor = self.sqlite_conn.execute(sql, params)
+            rows = cursor.fetchall()
+        
+        if key is not None:
+            cache.put(key, tables, rows)
+            return list(rows)
+        return rows
     
-    def fetchall(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
-        """Fetch all results from appropriate database."""
-        # Prefer PostgreSQL if in postgres_only mode, otherwise SQLite
-        use_postgres = self.settings.migration_mode == "postgres_only" and self.postgres_conn
+    def fetchall_dict(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """fetchall, with each row copied into a plain dict (e.g. for JSON encoding)."""
+        return [dict(row) for row in self.fetchall(sql, params)]
+    
+    def iter_rows(self, sql: str, params: tuple = (), chunk: int = 1000) -> Iterator[Mapping[str, Any]]:
+        """
+        Stream results without materializing the whole result set.
+        PostgreSQL uses a named server-side cursor fetching `chunk` rows per
+        round trip; SQLite reads `chunk` rows at a time with fetchmany.
+        """
+        use_postgres = self.settings.migration_mode == "postgres_only" and self.pg_pool is not None
         
         if use_postgres:
-            cursor = self.postgres_conn.cursor(cursor_factory=RealDictCursor)
+            with self._borrow_postgres() as conn:
+                cursor = conn.cursor(name=f"c{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+                cursor.itersize = chunk
+                try:
+                    cursor.execute(sql, params)
+                    yield from cursor
+                finally:
+                    cursor.close()
+        else:
+            cursor = self.sqlite_conn.execute(sql, params)
             try:
-                cursor.execute(sql, params)
-                return [dict(row) for row in cursor.fetchall()]
+                while True:
+                    rows = cursor.fetchmany(chunk)
+                    if not rows:
+                        break
+                    yield from rows
             finally:
                 cursor.close()
+    
+    def _execute_prepared(self, cursor, sql: str, params: tuple):
+        """
+        Run a read on PostgreSQL through a server-side prepared statement, so
+        repeated queries skip parsing and planning. Only positional-parameter
+        SELECT/WITH statements are prepared; anything else executes directly.
+        """
+        if not isinstance(params, (tuple, list)) or not _READ_RE.match(sql):
+            cursor.execute(sql, params)
+            return
+        name, prepare_sql = _prepared_statement(sql)
+        prepared = cursor.connection.prepared
+        if name not in prepared:
+            cursor.execute(prepare_sql)
+            prepared.add(name)
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
         else:
-            cursor = self.sqlite_conn.execute(sql, params)
-            return [dict(row) for row in cursor.fetchall()]
+            cursor.execute(f"EXECUTE {name}")
     
-    def fetchone(self, sql: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+    def fetchone(self, sql: str, params: tuple = ()) -> Optional[Mapping[str, Any]]:
         """Fetch single result."""
         results = self.fetchall(sql, params)
         return results[0] if results else None
     
+    def batch_get(self, table: str, pk_col: str, ids: Iterable[Any]) -> Dict[Any, Mapping[str, Any]]:
+        """
+        Look up many rows by primary key in one round trip.
+        Returns {id: row}; ids with no row are left out.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        
+        use_postgres = self.settings.migration_mode == "postgres_only" and self.pg_pool is not None
+        
+        if use_postgres:
+            with self._borrow_postgres() as conn:
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                try:
+                    cursor.execute(f"SELECT * FROM {table} WHERE {pk_col} = ANY(%s)", (ids,))
+                    return {row[pk_col]: row for row in cursor.fetchall()}
+                finally:
+                    cursor.close()
+        
+        rows = {}
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor = self.sqlite_conn.execute(f"SELECT * FROM {table} WHERE {pk_col} IN ({placeholders})", chunk)
+            for row in cursor.fetchall():
+                rows[row[pk_col]] = row
+        return rows
+    
     def close(self):
-        """Close all connections."""
+        """Close all connections, after the dual-write outbox has drained."""
+        if self._dw_thread is not None:
+            try:
+                self._outbox.put(None, timeout=DUAL_WRITE_CLOSE_TIMEOUT)
+                self._dw_thread.join(DUAL_WRITE_CLOSE_TIMEOUT)
+            except queue.Full:
+                pass
+            if self._dw_thread.is_alive():
+                logger.error(f"Dual-write outbox not drained on close, {self._outbox.qsize()} transactions pending")
+            self._dw_thread = None
         if self.sqlite_conn:
             self.sqlite_conn.close()
-        if self.postgres_conn:
-            self.postgres_conn.close()
+        if self.pg_pool is not None:
+            self.pg_pool.closeall()
+            self.pg_pool = None
     
     def health_check(self) -> Dict[str, Any]:
         """Check health of database connections."""
@@ -215,28 +785,47 @@ class DatabaseAdapter:
         }
         
         if self.sqlite_conn:
-            start = datetime.now()
+            t0 = time.perf_counter_ns()
             try:
-                self.sqlite_conn.execute("SELECT 1")
+                self.sqlite_conn.execute(_PING_SQL)
                 status["sqlite"] = {
                     "connected": True,
-                    "latency_ms": (datetime.now() - start).total_seconds() * 1000
+                    "latency_ms": (time.perf_counter_ns() - t0) / 1e6
                 }
             except Exception as e:
                 status["sqlite"]["error"] = str(e)
         
-        if self.postgres_conn:
-            start = datetime.now()
+        if self.pg_pool is not None:
+            # Health checks often run on short-lived threads (one per HTTP probe):
+            # hand back any connection checked out here, and report pool errors
+            held = getattr(self._pg_local, "conn", None) is not None
+            t0 = time.perf_counter_ns()
             try:
-                cursor = self.postgres_conn.cursor()
-                cursor.execute("SELECT 1")
+                conn = self.postgres_conn
+                if not held:
+                    # Ping outside a transaction, so handing the connection back needs no ROLLBACK
+                    conn.autocommit = True
+                # A plain statement: preparing it would cost a PREPARE per pooled
+                # checkout plus a DEALLOCATE when the connection is handed back
+                cursor = conn.cursor()
+                cursor.execute(_PING_SQL)
                 cursor.close()
                 status["postgres"] = {
                     "connected": True,
-                    "latency_ms": (datetime.now() - start).total_seconds() * 1000
+                    "latency_ms": (time.perf_counter_ns() - t0) / 1e6
                 }
             except Exception as e:
                 status["postgres"]["error"] = str(e)
+            finally:
+                if not held:
+                    self.release_postgres()
+        
+        if self._outbox is not None:
+            status["dual_write"] = {
+                "queue_depth": self._outbox.qsize(),
+                "failed_transactions": self.dual_write_failures,
+                "dropped_transactions": self.dual_write_dropped,
+            }
         
         return status
 
@@ -288,6 +877,7 @@ class SchemaManager:
             topics JSONB,
             base_value INTEGER DEFAULT 1,
             current_value INTEGER DEFAULT 1,
+            current_value_cents INTEGER DEFAULT 2,
             purchase_count INTEGER DEFAULT 0,
             total_value_earned INTEGER DEFAULT 0,
             rating_sum INTEGER DEFAULT 0,
@@ -330,3 +920,18 @@ class SchemaManager:
             self.adapter.postgres_conn.commit()
             cursor.close()
             logger.info("PostgreSQL schema initialized")
+    
+    def verify_sqlite(self, quick: bool = False) -> str:
+        """
+        Run PRAGMA integrity_check (or the cheaper quick_check) on the SQLite database.
+        Reads every page, so run it at startup or from cron, not per request.
+        Returns "ok" or the problems found, one per line.
+        """
+        if not self.adapter.sqlite_conn:
+            return "ok"
+        pragma = "quick_check" if quick else "integrity_check"
+        rows = self.adapter.sqlite_conn.execute(f"PRAGMA {pragma}").fetchall()
+        result = "\n".join(row[0] for row in rows)
+        if result != "ok":
+            logger.error(f"SQLite {pragma} failed: {result}")
+        return result
@@ -5,9 +5,20 @@ Handles configuration for separate server deployment.
 """
 import os
 import json
+import shlex
 from typing import Dict, Any, Optional
 from dataclasses import dataclass, asdict
 
+# Directories already created by this process; skips repeat makedirs calls
+_ENSURED_DIRS: set = set()
+
+
+def _ensure_dir(path: str):
+    """Create a directory once per process."""
+    if path not in _ENSURED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
 
 @dataclass
 class ServerConfig:
@@ -69,7 +80,7 @@ class ServerConfig:
     
     def to_file(self, path: str):
         """Save configuration to JSON file."""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _ensure_dir(os.path.dirname(path))
         with open(path, 'w') as f:
             json.dump(asdict(self), f, indent=2)
     
@@ -83,7 +94,7 @@ class ServerConfig:
             os.path.dirname(self.pid_file),
         ]
         for d in dirs:
-            os.makedirs(d, exist_ok=True)
+            _ensure_dir(d)
 
 
 class MigrationConfig:
@@ -96,12 +107,41 @@ class MigrationConfig:
         self.ssh_key = os.getenv("MIGRATION_SSH_KEY", "/opt/mud/.ssh/migration_key")
         self.rsync_user = os.getenv("MIGRATION_USER", "mudrunner")
         self.verify_checksums = True
+        # Hash rsync verifies each transferred file with; needs rsync >= 3.2 on both ends, "" for rsync's default
+        self.checksum_choice = os.getenv("MIGRATION_CHECKSUM_CHOICE", "xxh128")
+        self.deep_verify = os.getenv("MIGRATION_DEEP_VERIFY", "false").lower() == "true"  # full integrity_check instead of quick_check
+        self.ssh_control_path: Optional[str] = None  # shared SSH master socket, set by DataMigration
+        self.source_snapshot_path = os.getenv("MIGRATION_SNAPSHOT_PATH", "/tmp/moltmud_canonical.db")  # VACUUM INTO target on the source
+        self.ssh_cipher = os.getenv("MIGRATION_SSH_CIPHER", "aes128-gcm@openssh.com")  # AES-NI accelerated
         
-    def get_rsync_cmd(self) -> list:
-        """Build rsync command for data migration."""
-        return [
-            "rsync", "-avz", "--progress", "--checksum",
-            "-e", f"ssh -i {self.ssh_key}",
-            f"{self.rsync_user}@{self.source_host}:{self.source_db_path}",
+    def get_ssh_cmd(self) -> list:
+        """Build the ssh command (without destination) used for every connection to the source."""
+        # No PTY, no X11, no compression: the database is close to incompressible
+        cmd = ["ssh", "-T", "-x", "-o", "Compression=no", "-i", self.ssh_key]
+        if self.ssh_cipher:
+            cmd += ["-c", self.ssh_cipher]
+        if self.ssh_control_path:
+            cmd += ["-o", f"ControlPath={self.ssh_control_path}",
+                    "-o", "ControlMaster=auto", "-o", "ControlPersist=600"]
+        return cmd
+    
+    def get_rsync_cmd(self, whole_file: bool = True, source_path: Optional[str] = None) -> list:
+        """
+        Build rsync command for data migration.
+        whole_file skips rsync's delta algorithm (-W), the fast choice for a full
+        copy over a LAN; pass False when most of the target file is unchanged.
+        source_path overrides source_db_path (e.g. a snapshot on the source).
+        The target is the live database, so no --inplace: rsync builds a temp
+        file and renames it over the target, and an interrupted transfer leaves
+        the old copy intact, keeping its partial data in --partial-dir to resume.
+        """
+        cmd = ["rsync", "-av", "--progress", "--checksum", "--partial-dir=.rsync-partial", "--numeric-ids"]
+        if whole_file:
+            cmd.append("-W")
+        if self.checksum_choice:
+            cmd.append(f"--checksum-choice={self.checksum_choice}")
+        return cmd + [
+            "-e", shlex.join(self.get_ssh_cmd()),
+            f"{self.rsync_user}@{self.source_host}:{source_path or self.source_db_path}",
             self.target_db_path
         ]
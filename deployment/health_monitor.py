@@ -4,31 +4,100 @@ MoltMud Health Monitor
 Monitors server health and provides metrics endpoint.
 """
 import asyncio
+import functools
 import json
+import struct
+import threading
 import time
-import sqlite3
 import psutil
-from datetime import datetime
-from typing import Dict, Any
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 from config import ServerConfig
+from database_config import MigrationSettings
+from db_adapter import DatabaseAdapter, SchemaManager
+
+HEALTH_REFRESH_INTERVAL = 5  # seconds between background health checks
+PSUTIL_CACHE_TTL = 1.0  # seconds a disk/memory reading is reused
+
+
+if ORJSON_AVAILABLE:
+    def encode_snapshot(data: Dict[str, Any]) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+else:
+    def encode_snapshot(data: Dict[str, Any]) -> bytes:
+        return json.dumps(data, indent=2).encode()
+
+
+def _ttl_cache(ttl: float):
+    """Memoize a function's result per argument tuple for ttl seconds."""
+    def decorator(func):
+        cache = {}
+        
+        @functools.wraps(func)
+        def wrapper(*args):
+            now = time.monotonic()
+            cached = cache.get(args)
+            if cached and cached[0] > now:
+                return cached[1]
+            value = func(*args)
+            cache[args] = (now + ttl, value)
+            return value
+        return wrapper
+    return decorator
+
+
+@_ttl_cache(PSUTIL_CACHE_TTL)
+def _disk(path: str):
+    return psutil.disk_usage(path)
+
+
+@_ttl_cache(PSUTIL_CACHE_TTL)
+def _mem():
+    return psutil.virtual_memory()
 
 
 class MUDHealthChecker:
     """Health checker for MUD server components."""
     
-    def __init__(self, config: ServerConfig):
+    def __init__(self, config: ServerConfig, adapter: Optional[DatabaseAdapter] = None,
+                 accepting: Optional[threading.Event] = None):
         self.config = config
+        self.adapter = adapter or self._open_adapter(config)
+        # The MUD server's mud_accepting event, when running in the same process
+        self.accepting = accepting
         self.start_time = time.time()
         self.checks_performed = 0
         self.failed_checks = 0
+        # integrity_check reads the whole database: run it once here, report the result after
+        self.integrity_checked_at = datetime.now(timezone.utc).isoformat()
+        self.integrity_result = SchemaManager(self.adapter).verify_sqlite()
+        self._snapshot: Optional[tuple] = None  # (status code, JSON body) served by /health
+    
+    @staticmethod
+    def _open_adapter(config: ServerConfig) -> DatabaseAdapter:
+        """Open the long-lived adapter the checks run on, pointed at the MUD database."""
+        settings = MigrationSettings()
+        settings.sqlite_path = config.db_path
+        return DatabaseAdapter(settings)
         
     def check_tcp_port(self) -> Dict[str, Any]:
         """Check if MUD TCP port is accepting connections."""
+        if self.accepting is not None and self.accepting.is_set():
+            return {"status": "healthy", "latency_ms": 0, "error": None}
+        
         import socket
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Reset on close instead of leaving a TIME_WAIT entry per probe
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
             sock.settimeout(2)
             result = sock.connect_ex((self.config.host, self.config.port))
             sock.close()
@@ -41,34 +110,42 @@ class MUDHealthChecker:
             return {"status": "unhealthy", "latency_ms": None, "error": str(e)}
     
     def check_database(self) -> Dict[str, Any]:
-        """Check database connectivity and integrity."""
+        """
+        Check database connectivity on the adapter's open connections.
+        Integrity is reported from the startup integrity_check, not re-run.
+        """
         try:
-            start = time.time()
-            conn = sqlite3.connect(self.config.db_path, timeout=5)
-            cursor = conn.cursor()
-            cursor.execute("PRAGMA integrity_check")
-            result = cursor.fetchone()
-            cursor.execute("SELECT COUNT(*) FROM agents")
-            agent_count = cursor.fetchone()[0]
-            conn.close()
-            latency = (time.time() - start) * 1000
+            health = self.adapter.health_check()
+            settings = self.adapter.settings
+            backends = [health[name] for name, enabled in (
+                ("sqlite", settings.is_sqlite_enabled()),
+                ("postgres", settings.is_postgres_enabled()),
+            ) if enabled]
+            for backend in backends:
+                if not backend["connected"]:
+                    return {"status": "unhealthy", "latency_ms": None, "error": backend.get("error", "not connected")}
             
-            if result[0] == "ok":
-                return {
-                    "status": "healthy", 
-                    "latency_ms": round(latency, 2),
-                    "agents": agent_count,
-                    "error": None
-                }
-            else:
-                return {"status": "unhealthy", "latency_ms": None, "error": result[0]}
+            if self.integrity_result != "ok":
+                return {"status": "unhealthy", "latency_ms": None, "error": self.integrity_result,
+                        "integrity_checked_at": self.integrity_checked_at}
+            
+            # max(id) is an index lookup where COUNT(*) would scan the whole table;
+            # it is the highest agent id, not a row count, hence the key name
+            row = self.adapter.fetchone("SELECT max(id) AS max_id FROM agents")
+            return {
+                "status": "healthy",
+                "latency_ms": round(max(b["latency_ms"] for b in backends), 2) if backends else 0,
+                "max_agent_id": (row["max_id"] or 0) if row else 0,
+                "integrity_checked_at": self.integrity_checked_at,
+                "error": None
+            }
         except Exception as e:
             return {"status": "unhealthy", "latency_ms": None, "error": str(e)}
     
     def check_disk_space(self) -> Dict[str, Any]:
         """Check available disk space."""
         try:
-            stat = psutil.disk_usage(self.config.app_root)
+            stat = _disk(self.config.app_root)
             percent_used = stat.percent
             gb_free = stat.free / (1024**3)
             
@@ -86,7 +163,7 @@ class MUDHealthChecker:
     def check_memory(self) -> Dict[str, Any]:
         """Check system memory usage."""
         try:
-            mem = psutil.virtual_memory()
+            mem = _mem()
             return {
                 "status": "healthy" if mem.percent < 90 else "warning",
                 "percent_used": mem.percent,
@@ -131,7 +208,7 @@ class MUDHealthChecker:
         
         return {
             "status": overall,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "uptime_seconds": round(self.get_uptime(), 2),
             "checks": checks,
             "metrics": {
@@ -142,25 +219,49 @@ class MUDHealthChecker:
         }
 
 
+    def refresh_snapshot(self):
+        """Run a full health check and store the encoded /health response."""
+        health_data = self.perform_health_check()
+        status_code = 200 if health_data["status"] == "healthy" else 503
+        self._snapshot = (status_code, encode_snapshot(health_data))
+
+
+def _refresher(checker: MUDHealthChecker, interval: float):
+    """Keep the /health snapshot current so requests never run the checks themselves."""
+    while True:
+        time.sleep(interval)
+        try:
+            checker.refresh_snapshot()
+        except Exception as e:
+            print(f"Health check failed: {e}")
+
+
 class HealthHandler(BaseHTTPRequestHandler):
     """HTTP handler for health check endpoint."""
     
     checker = None  # Set by main()
+    protocol_version = "HTTP/1.1"  # keep-alive for scrapers; every response sets Content-Length
     
     def log_message(self, format, *args):
         """Suppress default logging."""
         pass
     
+    def _send(self, status_code: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+        self.send_response(status_code)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def do_GET(self):
         """Handle GET requests."""
         if self.path == "/health":
-            health_data = self.checker.perform_health_check()
-            status_code = 200 if health_data["status"] == "healthy" else 503
-            
-            self.send_response(status_code)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(health_data, indent=2).encode())
+            status_code, body = self.checker._snapshot
+            self._send(status_code, body, {
+                "Content-Type": "application/json",
+                "Cache-Control": f"max-age={HEALTH_REFRESH_INTERVAL}",
+            })
             
         elif self.path == "/metrics":
             metrics = {
@@ -168,10 +269,7 @@ class HealthHandler(BaseHTTPRequestHandler):
                 "checks_performed": self.checker.checks_performed,
                 "failed_checks": self.checker.failed_checks,
             }
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps(metrics).encode())
+            self._send(200, json.dumps(metrics).encode(), {"Content-Type": "application/json"})
             
         elif self.path == "/ready":
             # Kubernetes-style readiness probe
@@ -179,24 +277,27 @@ class HealthHandler(BaseHTTPRequestHandler):
             db = self.checker.check_database()
             
             if tcp["status"] == "healthy" and db["status"] == "healthy":
-                self.send_response(200)
-                self.end_headers()
-                self.wfile.write(b"ready")
+                self._send(200, b"ready")
             else:
-                self.send_response(503)
-                self.end_headers()
-                self.wfile.write(b"not ready")
+                self._send(503, b"not ready")
         else:
-            self.send_response(404)
-            self.end_headers()
+            self._send(404)
 
 
-def run_health_server(port: int = 8080):
-    """Run the health check HTTP server."""
+def run_health_server(port: int = 8080, interval: float = HEALTH_REFRESH_INTERVAL,
+                      accepting: Optional[threading.Event] = None):
+    """
+    Run the health check HTTP server.
+    accepting: the MUD server's mud_accepting event, when both run in one process;
+    otherwise the TCP check connects to the MUD port.
+    """
     config = ServerConfig.from_env()
-    HealthHandler.checker = MUDHealthChecker(config)
+    checker = MUDHealthChecker(config, accepting=accepting)
+    checker.refresh_snapshot()
+    threading.Thread(target=_refresher, args=(checker, interval), daemon=True).start()
+    HealthHandler.checker = checker
     
-    server = HTTPServer(("0.0.0.0", port), HealthHandler)
+    server = ThreadingHTTPServer(("0.0.0.0", port), HealthHandler)
     print(f"Health monitor running on port {port}")
     
     try:
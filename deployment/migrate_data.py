@@ -6,15 +6,58 @@ Handles migration of game data from old server to new server.
 import os
 import sys
 import hashlib
+import mmap
 import subprocess
 import sqlite3
+import shlex
 import shutil
+import tempfile
+import time
+import weakref
 from datetime import datetime
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import List, Optional
+
+# Optional BLAKE3 (SIMD, multithreaded); SHA-256 uses SHA-NI where the CPU has it
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
 
 from config import MigrationConfig, ServerConfig
 
+CHECKSUM_ALGORITHM = "blake3" if BLAKE3_AVAILABLE else "sha256"
+
+VERIFY_TABLES = ["agents", "rooms", "knowledge_fragments", "sessions"]
+VERIFY_COUNTS_SQL = " UNION ALL ".join(
+    f"SELECT '{table}', COUNT(*) FROM {table}" for table in VERIFY_TABLES
+)
+
+
+def _utc_iso(ns: int) -> str:
+    """Format a time.time_ns() value like datetime.utcnow().isoformat()."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(ns // 1_000_000_000)) + f".{ns // 1000 % 1_000_000:06d}"
+
+
+def _madvise_sequential(view: mmap.mmap):
+    """Ask the kernel to read ahead aggressively, where madvise exists."""
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        view.madvise(mmap.MADV_SEQUENTIAL)
+
+
+def _close_ssh_master(ssh_cmd: List[str], target: str, ssh_dir: str):
+    """Stop the SSH master on ssh_dir's ControlPath, if one is running, and remove the directory."""
+    try:
+        subprocess.run(
+            ssh_cmd + ["-O", "exit", target],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    shutil.rmtree(ssh_dir, ignore_errors=True)
+
 
 class DataMigration:
     """Handles migration of MUD data between servers."""
@@ -22,22 +65,63 @@ class DataMigration:
     def __init__(self, config: Optional[MigrationConfig] = None):
         self.config = config or MigrationConfig()
         self.server_config = ServerConfig.from_env()
-        self.migration_log = []
+        self.migration_log: List[str] = []  # formatted lines, newline-terminated
+        # One SSH master connection shared by the connectivity check, rsync and
+        # delta sync; its ControlPath directory is created on first use
+        self._ssh_master = False
+        self._ssh_cleanup: Optional[weakref.finalize] = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    @property
+    def ssh_target(self) -> str:
+        return f"{self.config.rsync_user}@{self.config.source_host}"
+    
+    def _ensure_ssh_master(self):
+        """Open the shared SSH master connection, if it isn't already up."""
+        if self._ssh_master:
+            return
+        if self._ssh_cleanup is None:
+            ssh_dir = tempfile.mkdtemp(prefix="moltmud-ssh-")
+            self.config.ssh_control_path = os.path.join(ssh_dir, "cm-%r@%h:%p")
+            # Runs from close(), or at garbage collection / interpreter exit when the
+            # caller never closes; ControlMaster=auto can start a master even if -MNf fails
+            self._ssh_cleanup = weakref.finalize(
+                self, _close_ssh_master, self.config.get_ssh_cmd(), self.ssh_target, ssh_dir
+            )
+        # -f backgrounds after authentication; no pipes, so nothing waits on the master
+        result = subprocess.run(
+            self.config.get_ssh_cmd() + ["-MNf", self.ssh_target],
+            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            timeout=10
+        )
+        self._ssh_master = result.returncode == 0
+    
+    def close(self):
+        """Shut down the SSH master connection and remove its socket directory."""
+        if self._ssh_cleanup is not None:
+            self._ssh_cleanup()
+            self._ssh_cleanup = None
+            self.config.ssh_control_path = None
+        self._ssh_master = False
         
     def log(self, message: str):
         """Log migration step."""
-        timestamp = datetime.utcnow().isoformat()
-        entry = f"[{timestamp}] {message}"
+        # Formatted once; generate_report reuses the same line
+        entry = f"[{_utc_iso(time.time_ns())}] {message}\n"
         self.migration_log.append(entry)
-        print(entry)
+        sys.stdout.write(entry)
         
     def verify_source_connectivity(self) -> bool:
         """Verify SSH connectivity to source server."""
         try:
+            self._ensure_ssh_master()
             result = subprocess.run(
-                ["ssh", "-i", self.config.ssh_key, 
-                 f"{self.config.rsync_user}@{self.config.source_host}", 
-                 "echo 'connected'"],
+                self.config.get_ssh_cmd() + [self.ssh_target, "echo 'connected'"],
                 capture_output=True,
                 text=True,
                 timeout=10
@@ -53,12 +137,20 @@ class DataMigration:
             return False
             
     def calculate_checksum(self, filepath: str) -> str:
-        """Calculate MD5 checksum of file."""
-        hash_md5 = hashlib.md5()
+        """Calculate CHECKSUM_ALGORITHM checksum of file; both ends must use the same one."""
+        if BLAKE3_AVAILABLE:
+            digest = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        else:
+            digest = hashlib.sha256()
+        # Map the file and hash it in one update() call: no per-chunk reads or
+        # interpreter loop, and the hash runs on the whole buffer without the GIL
         with open(filepath, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+                    _madvise_sequential(view)
+                    digest.update(view)
+        return digest.hexdigest()
     
     def backup_local_database(self) -> str:
         """Create backup of local database before migration."""
@@ -67,14 +159,23 @@ class DataMigration:
         backup_path = os.path.join(backup_dir, f"moltmud_pre_migration_{timestamp}.db")
         
         if os.path.exists(self.server_config.db_path):
-            shutil.copy2(self.server_config.db_path, backup_path)
+            # Online backup API: a consistent snapshot copied 1024 pages at a time,
+            # without blocking the running server's readers and writers
+            src = sqlite3.connect(self.server_config.db_path)
+            dst = sqlite3.connect(backup_path)
+            try:
+                with dst:
+                    src.backup(dst, pages=1024)
+            finally:
+                dst.close()
+                src.close()
             self.log(f"✓ Local database backed up to {backup_path}")
         else:
             self.log("! No existing local database to backup")
             
         return backup_path
     
-    def migrate_database(self) -> bool:
+    def migrate_database(self, source_path: Optional[str] = None, whole_file: bool = True) -> bool:
         """Migrate database from source server."""
         self.log("Starting database migration...")
         
@@ -82,16 +183,19 @@ class DataMigration:
         os.makedirs(os.path.dirname(self.config.target_db_path), exist_ok=True)
         
         # Build and execute rsync command
-        cmd = self.config.get_rsync_cmd()
+        cmd = self.config.get_rsync_cmd(whole_file=whole_file, source_path=source_path)
         self.log(f"Executing: {' '.join(cmd)}")
         
         try:
+            self._ensure_ssh_master()
             result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
             if result.returncode != 0:
                 self.log(f"✗ Rsync failed: {result.stderr}")
                 return False
                 
-            self.log("✓ Database file transferred successfully")
+            # rsync checks every transferred file against a whole-file checksum
+            # computed during the transfer, so the copy is not re-read and hashed here
+            self.log("✓ Database file transferred and checksum-verified by rsync")
             
             if self.config.verify_checksums:
                 return self.verify_migration()
@@ -114,27 +218,26 @@ class DataMigration:
             return False
             
         try:
-            # Check SQLite integrity
+            # Check SQLite integrity. quick_check walks each b-tree once but skips
+            # the index-vs-table cross-checks; integrity_check only with deep_verify
             conn = sqlite3.connect(self.config.target_db_path)
             cursor = conn.cursor()
-            cursor.execute("PRAGMA integrity_check")
+            cursor.execute("PRAGMA cache_size=-16000")
+            cursor.execute("PRAGMA mmap_size=268435456")
+            check = "integrity_check" if self.config.deep_verify else "quick_check"
+            cursor.execute(f"PRAGMA {check}")
             result = cursor.fetchone()
-            conn.close()
             
             if result[0] != "ok":
-                self.log(f"✗ Database integrity check failed: {result[0]}")
+                conn.close()
+                self.log(f"✗ Database {check} failed: {result[0]}")
                 return False
                 
-            self.log("✓ Database integrity check passed")
+            self.log(f"✓ Database {check} passed")
             
-            # Verify row counts for key tables
-            conn = sqlite3.connect(self.config.target_db_path)
-            cursor = conn.cursor()
-            tables = ["agents", "rooms", "knowledge_fragments", "sessions"]
-            
-            for table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
+            # Verify row counts for key tables, in one statement
+            cursor.execute(VERIFY_COUNTS_SQL)
+            for table, count in cursor.fetchall():
                 self.log(f"  - Table '{table}': {count} rows")
                 
             conn.close()
@@ -146,9 +249,40 @@ class DataMigration:
             return False
     
     def sync_delta_changes(self) -> bool:
-        """Perform final sync to capture changes since initial migration."""
+        """
+        Perform final sync to capture changes since initial migration.
+        The source is first rewritten with VACUUM INTO: a compact, page-ordered
+        copy whose layout only shifts where rows changed, so rsync's delta
+        transfer sends roughly the changed pages rather than the whole file.
+        """
         self.log("Performing delta sync...")
-        return self.migrate_database()
+        snapshot = self.config.source_snapshot_path
+        # A SQL string literal (embedded quotes doubled); the whole statement is shell-quoted below
+        literal = snapshot.replace("'", "''")
+        vacuum = f"VACUUM INTO '{literal}'"
+        remote_cmd = (f"rm -f {shlex.quote(snapshot)} && "
+                      f"sqlite3 {shlex.quote(self.config.source_db_path)} {shlex.quote(vacuum)}")
+        
+        try:
+            self._ensure_ssh_master()
+            result = subprocess.run(
+                self.config.get_ssh_cmd() + [self.ssh_target, remote_cmd],
+                capture_output=True, text=True, timeout=300
+            )
+        except subprocess.TimeoutExpired:
+            result = None
+        if result is None or result.returncode != 0:
+            self.log(f"! VACUUM INTO on source failed, syncing the live file: {result.stderr if result else 'timed out'}")
+            return self.migrate_database(whole_file=False)
+        
+        try:
+            return self.migrate_database(source_path=snapshot, whole_file=False)
+        finally:
+            subprocess.run(
+                self.config.get_ssh_cmd() + [self.ssh_target, f"rm -f {shlex.quote(snapshot)}"],
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                timeout=30
+            )
     
     def generate_report(self) -> str:
         """Generate migration report."""
@@ -158,14 +292,15 @@ class DataMigration:
         )
         
         with open(report_path, 'w') as f:
-            f.write("MoltMud Data Migration Report\n")
-            f.write("=" * 50 + "\n\n")
-            f.write(f"Source: {self.config.source_host}\n")
-            f.write(f"Target: {self.server_config.external_hostname}\n")
-            f.write(f"Timestamp: {datetime.utcnow().isoformat()}\n\n")
-            f.write("Log:\n")
-            for entry in self.migration_log:
-                f.write(f"{entry}\n")
+            f.write(
+                "MoltMud Data Migration Report\n"
+                + "=" * 50 + "\n\n"
+                + f"Source: {self.config.source_host}\n"
+                + f"Target: {self.server_config.external_hostname}\n"
+                + f"Timestamp: {datetime.utcnow().isoformat()}\n\n"
+                + "Log:\n"
+                + "".join(self.migration_log)
+            )
                 
         self.log(f"Report saved to {report_path}")
         return report_path
@@ -182,27 +317,31 @@ def main():
                        help="Perform delta sync only")
     parser.add_argument("--backup", action="store_true", default=True,
                        help="Create backup before migration")
+    parser.add_argument("--deep-verify", action="store_true",
+                       help="Run the full integrity_check instead of quick_check")
     
     args = parser.parse_args()
     
     config = MigrationConfig()
-    migrator = DataMigration(config)
-    
-    if args.verify_only:
-        success = migrator.verify_migration()
-    elif args.delta_sync:
-        success = migrator.sync_delta_changes()
-    else:
-        # Full migration
-        if not migrator.verify_source_connectivity():
-            sys.exit(1)
-            
-        if args.backup:
-            migrator.backup_local_database()
-            
-        success = migrator.migrate_database()
-        if success:
-            migrator.generate_report()
+    if args.deep_verify:
+        config.deep_verify = True
+    
+    with DataMigration(config) as migrator:
+        if args.verify_only:
+            success = migrator.verify_migration()
+        elif args.delta_sync:
+            success = migrator.sync_delta_changes()
+        else:
+            # Full migration
+            if not migrator.verify_source_connectivity():
+                sys.exit(1)
+                
+            if args.backup:
+                migrator.backup_local_database()
+                
+            success = migrator.migrate_database()
+            if success:
+                migrator.generate_report()
     
     sys.exit(0 if success else 1)
 
@@ -5,6 +5,7 @@ Automates provisioning of new MUD server instance.
 """
 import os
 import sys
+import shlex
 import subprocess
 import argparse
 from pathlib import Path
@@ -17,17 +18,21 @@ class ServerSetup:
     def __init__(self, config: ServerConfig = None):
         self.config = config or ServerConfig.from_env()
         self.errors = []
+        self._is_root = os.geteuid() == 0
         
     def run_command(self, cmd: list, check: bool = True, sudo: bool = False) -> bool:
         """Execute shell command."""
-        if sudo and os.geteuid() != 0:
+        if sudo and not self._is_root:
             cmd = ["sudo"] + cmd
             
         try:
+            # stdin from /dev/null: a command that prompts fails instead of hanging setup
             result = subprocess.run(
                 cmd, 
                 check=check, 
-                capture_output=True, 
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 text=True
             )
             if result.stdout:
@@ -69,13 +74,13 @@ class ServerSetup:
             ["ufw", "allow", "22/tcp"],      # SSH
             ["ufw", "allow", "4000/tcp"],    # MUD
             ["ufw", "allow", "8080/tcp"],    # Health monitor
+            ["ufw", "--force", "enable"],
         ]
         
-        for cmd in commands:
-            self.run_command(cmd, sudo=True)
-            
-        # Enable firewall
-        self.run_command(["ufw", "--force", "enable"], sudo=True)
+        # One shell (and one sudo) for the whole sequence; stops before enabling
+        # the firewall if any rule fails, rather than risk locking out SSH
+        script = " && ".join(shlex.join(cmd) for cmd in commands)
+        self.run_command(["sh", "-c", script], sudo=True)
         print("Firewall configured: ports 22, 4000, 8080 open")
     
     def setup_user(self):
@@ -65,12 +65,13 @@ class MigrationRunner:
                 )
                 count = result["count"] if result else 0
                 
-                # Simple checksum based on concatenated IDs
-                ids_result = self.adapter.fetchall(
-                    f"SELECT id FROM {table} ORDER BY id"
-                )
-                id_str = ",".join(str(r["id"]) for r in ids_result)
-                checksum = hashlib.md5(id_str.encode()).hexdigest()
+                # Simple checksum based on concatenated IDs, hashed as they stream in
+                digest = hashlib.md5()
+                separator = b""
+                for r in self.adapter.iter_rows(f"SELECT id FROM {table} ORDER BY id"):
+                    digest.update(separator + str(r["id"]).encode())
+                    separator = b","
+                checksum = digest.hexdigest()
                 
                 checksums[table] = {
                     "count": count,
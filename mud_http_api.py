@@ -2,6 +2,7 @@
 """HTTP API wrapper for the MoltMud TCP server.
 
 Translates REST calls into TCP JSON messages to the MUD on localhost:4000.
+Messages are newline-delimited JSON, one response line per request.
 Run with: ~/mudvenv/bin/uvicorn mud_http_api:app --host 0.0.0.0 --port 8000
 """
 
@@ -12,30 +13,53 @@ from typing import Any, Optional
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 app = FastAPI(title="MoltMud API", version="0.1.0")
 
 MUD_HOST = "127.0.0.1"
 MUD_PORT = 4000
+MUD_READ_LIMIT = 2 ** 20  # largest response line accepted from the MUD
+
+
+if ORJSON_AVAILABLE:
+    def encode_json(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    decode_json = orjson.loads  # orjson.JSONDecodeError subclasses json.JSONDecodeError
+else:
+    def encode_json(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    def decode_json(data: bytes):
+        return json.loads(data)
 
 
 async def mud_request(payload: dict) -> dict:
     """Send a JSON request to the MUD TCP server and return the response."""
     try:
         reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(MUD_HOST, MUD_PORT), timeout=5
+            asyncio.open_connection(MUD_HOST, MUD_PORT, limit=MUD_READ_LIMIT), timeout=5
         )
     except (ConnectionRefusedError, asyncio.TimeoutError):
         raise HTTPException(503, "MUD server unavailable")
 
     try:
-        writer.write(json.dumps(payload).encode())
+        writer.write(encode_json(payload) + b"\n")
         await writer.drain()
-        data = await asyncio.wait_for(reader.read(65536), timeout=10)
-        return json.loads(data.decode())
+        data = await asyncio.wait_for(reader.readline(), timeout=10)
+        return decode_json(data)
     except asyncio.TimeoutError:
         raise HTTPException(504, "MUD server timeout")
     except json.JSONDecodeError:
         raise HTTPException(502, "Invalid response from MUD server")
+    except (ValueError, asyncio.LimitOverrunError):
+        # readline() raises ValueError for a line longer than MUD_READ_LIMIT
+        raise HTTPException(502, "Response from MUD server too large")
     finally:
         writer.close()
         try: